@@ -2,46 +2,103 @@
 Environment configuration for the IPA Transcription API
 """
 import os
-from typing import List
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import List, Optional
 
-# Load environment variables from .env file
-load_dotenv()
 
-class Config:
-    """Configuration class with environment variables and defaults"""
-    
+@lru_cache(maxsize=1)
+def _init_env() -> None:
+    """Load environment variables from the .env file (only once per process)"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def _split_csv(value: str) -> List[str]:
+    """Parse a comma-separated environment value ('' -> [])"""
+    return value.split(',') if value else []
+
+
+# Database shipped next to this file; used when DATABASE_PATH is not set
+_BUNDLED_DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ipa_en.sqlite')
+
+
+# (attribute / environment variable, default, converter)
+_SETTINGS = (
     # Server Configuration
-    PORT: int = int(os.getenv('PORT', '8002'))
-    HOST: str = os.getenv('HOST', '0.0.0.0')
+    ('PORT', '8002', int),
+    ('HOST', '0.0.0.0', str),
     
     # Database Configuration
-    DATABASE_PATH: str = os.getenv('DATABASE_PATH', './app/data/ipa_database.db')
+    ('DATABASE_PATH', _BUNDLED_DATABASE_PATH, str),
     
     # CORS Configuration
-    _cors_env = os.getenv('CORS_ORIGINS', '')
-    CORS_ORIGINS: List[str] = _cors_env.split(',') if _cors_env else []
+    ('CORS_ORIGINS', '', _split_csv),
     
     # API Configuration
-    API_TITLE: str = os.getenv('API_TITLE', 'IPA Transcription API')
-    API_DESCRIPTION: str = os.getenv(
-        'API_DESCRIPTION', 
-        'API for English IPA transcriptions with advanced phonetic rules'
-    )
-    API_VERSION: str = os.getenv('API_VERSION', '1.0.0')
+    ('API_TITLE', 'IPA Transcription API', str),
+    ('API_DESCRIPTION', 'API for English IPA transcriptions with advanced phonetic rules', str),
+    ('API_VERSION', '1.0.0', str),
     
     # Environment
-    ENVIRONMENT: str = os.getenv('ENVIRONMENT', 'production')
+    ('ENVIRONMENT', 'production', str),
     
-    @classmethod
-    def is_development(cls) -> bool:
+    # Admin token for POST /cache/reload ('' disables the endpoint)
+    ('ADMIN_TOKEN', '', str),
+)
+
+
+class Config:
+    """Configuration class with environment variables and defaults"""
+    
+    PORT: int
+    HOST: str
+    DATABASE_PATH: str
+    CORS_ORIGINS: List[str]
+    API_TITLE: str
+    API_DESCRIPTION: str
+    API_VERSION: str
+    ENVIRONMENT: str
+    ADMIN_TOKEN: str
+    
+    def __init__(self):
+        _init_env()
+        
+        # Snapshot the environment once; attributes are never re-read
+        environ = os.environ
+        for name, default, convert in _SETTINGS:
+            setattr(self, name, convert(environ.get(name, default)))
+    
+    def is_development(self) -> bool:
         """Check if running in development mode"""
-        return cls.ENVIRONMENT.lower() == 'development'
+        return self.ENVIRONMENT.lower() == 'development'
     
-    @classmethod
-    def is_production(cls) -> bool:
+    def is_production(self) -> bool:
         """Check if running in production mode"""
-        return cls.ENVIRONMENT.lower() == 'production'
+        return self.ENVIRONMENT.lower() == 'production'
+
+
+def resolve_database_path(db_path: Optional[str] = None) -> str:
+    """Database path for both transcription services (explicit > DATABASE_PATH > bundled)"""
+    if db_path is not None:
+        return db_path
+    try:
+        return _get_config().DATABASE_PATH
+    except ImportError:
+        return _BUNDLED_DATABASE_PATH
+
+
+def _get_config() -> Config:
+    """Return the global config instance, creating it on first use"""
+    instance = globals().get('config')
+    if instance is None:
+        instance = Config()
+        # Stored as a module global, so later `config` lookups skip __getattr__
+        globals()['config'] = instance
+    return instance
+
 
-# Global config instance
-config = Config()
\ No newline at end of file
+def __getattr__(name: str):
+    """Create the global config instance on first access (PEP 562)"""
+    if name == 'config':
+        return _get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
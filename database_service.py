@@ -3,8 +3,10 @@ Database Service Module
 Handles all database access operations for IPA transcriptions.
 """
 import sqlite3
-from typing import Optional
+from contextlib import closing
+from typing import Dict, List, Optional
 import os
+from pathlib import Path
 
 
 class DatabaseService:
@@ -13,12 +15,49 @@ class DatabaseService:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self._validate_db()
+        # The whole table (~90k rows, a few MB) is loaded once; every lookup
+        # afterwards is a dict probe and SQLite stays off the request path.
+        # Each accent gets its own word -> IPA dict with the column fallback
+        # already applied, so a lookup does not branch on the accent
+        self.reload()
+    
+    def reload(self) -> None:
+        """Re-read the table, e.g. after the database file was updated"""
+        by_accent = self._load_index()
+        self._american = by_accent['american']
+        self._rp = by_accent['rp']
+        self._by_accent: Dict[str, Dict[str, Optional[str]]] = by_accent
     
     def _validate_db(self):
         """Validate that database exists and is accessible"""
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(f"Database file not found: {self.db_path}")
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a read-only connection tuned for one sequential scan"""
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True)
+        conn.execute("PRAGMA query_only=1")
+        # Read pages from a memory map instead of pread() calls; the file is
+        # already in WAL mode on disk
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
+    def _load_index(self) -> Dict[str, Dict[str, Optional[str]]]:
+        """Read every row into one word -> IPA dict per accent and close the connection"""
+        # Rows are streamed from the cursor into the dict rather than staged
+        # in a fetchall() list first, which lowers the peak memory at startup.
+        # Words are stored lowercased and lookups lower their key, so no
+        # NOCASE index or per-thread connection pool is needed
+        american: Dict[str, Optional[str]] = {}
+        rp: Dict[str, Optional[str]] = {}
+        with closing(self._connect()) as conn:
+            for word, us, gb in conn.execute("SELECT word, us, gb FROM ipa"):
+                american[word] = us or gb
+                rp[word] = gb or us
+        return {'american': american, 'rp': rp}
+    
     def lookup_word(self, word: str, accent: str) -> Optional[str]:
         """
         Lookup a word in the database
@@ -30,38 +69,33 @@ class DatabaseService:
         Returns:
             IPA transcription or None if not found
         """
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cur = conn.cursor()
-            cur.execute("SELECT us, gb FROM ipa WHERE word=?", (word.lower(),))
-            row = cur.fetchone()
-            conn.close()
-            
-            if not row:
-                return None
-            
-            us, gb = row
-            if accent == 'american':
-                return us or gb
-            return gb or us
+        return self._by_accent.get(accent, self._rp).get(word.lower())
+    
+    def lookup_words(self, words: List[str], accent: str) -> Dict[str, str]:
+        """
+        Lookup several words at once
+        
+        Args:
+            words: Words to look up (duplicates and case are ignored)
+            accent: 'american' or 'rp'
             
-        except sqlite3.Error as e:
-            # Log error in production
-            print(f"Database error: {e}")
-            return None
+        Returns:
+            Dict mapping lowercased word -> IPA for the words that were found
+        """
+        index = self._by_accent.get(accent, self._rp)
+        found: Dict[str, str] = {}
+        
+        for word in {w.lower() for w in words}:
+            ipa = index.get(word)
+            if ipa:
+                found[word] = ipa
+        
+        return found
     
     def get_word_count(self) -> int:
         """Get total number of words in database"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cur = conn.cursor()
-            cur.execute("SELECT COUNT(*) FROM ipa")
-            count = cur.fetchone()[0]
-            conn.close()
-            return count
-        except sqlite3.Error:
-            return 0
+        return len(self._american)
     
     def word_exists(self, word: str) -> bool:
         """Check if a word exists in database"""
-        return self.lookup_word(word, 'american') is not None or self.lookup_word(word, 'rp') is not None
\ No newline at end of file
+        return word.lower() in self._american
@@ -1,170 +1,270 @@
 """External IPA Fallback Service
 Consulta Wiktionary y otros diccionarios cuando una palabra no se encuentra en la DB local.
 """
-import requests
+import asyncio
+import httpx
 import re
-from typing import Optional, Dict, List
-from bs4 import BeautifulSoup
-import concurrent.futures
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Dict, List
+import lxml.html
+from lxml import etree
+
+
+# Compilados una sola vez al importar el módulo
+_IPA_SLASH_RE = re.compile(r'^/(.+)/$')
+# Marcadores de dialecto: una sola pasada en C por el contexto en lugar de
+# una búsqueda por marcador (misma semántica de subcadena que antes)
+_US_MARKERS_RE = re.compile(r'us|general american|ga|genamer')
+_UK_MARKERS_RE = re.compile(r'uk|rp|received pronunciation|british')
+
+
+def _has_class(name: str) -> str:
+    """Predicado XPath: el atributo class contiene el token name (clases múltiples)"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Todos los span.IPA de una página de Wiktionary, en orden de documento
+_WIKTIONARY_IPA_SPANS = etree.XPath(f"//span[{_has_class('IPA')}]")
+
+# Primer span.ipa dentro del primer span.uk / span.us de la página
+_CAMBRIDGE_UK_IPA = etree.XPath(f"((//span[{_has_class('uk')}])[1]//span[{_has_class('ipa')}])[1]")
+_CAMBRIDGE_US_IPA = etree.XPath(f"((//span[{_has_class('us')}])[1]//span[{_has_class('ipa')}])[1]")
+
+# Caché en memoria de resultados ya parseados por (fuente, palabra)
+_CACHE_MAX_SIZE = 20000
+_CACHE_TTL_SECONDS = 24 * 60 * 60
+_MISS = object()
+
+
+def create_http_client(timeout: int = 5) -> httpx.AsyncClient:
+    """
+    Crea el cliente HTTP asíncrono para las fuentes externas
+    
+    Un único cliente reutiliza conexiones entre peticiones; el pool mantiene
+    vivas las conexiones a ambos hosts y los fallos de conexión se reintentan
+    antes de dar la fuente por perdida.
+    """
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        retries=2,
+    )
+    return httpx.AsyncClient(
+        headers={'User-Agent': 'IPA-Transcription-Service/1.0'},
+        timeout=timeout,
+        follow_redirects=True,
+        transport=transport,
+    )
 
 
 class ExternalIPAFallback:
     """Servicio de fallback para obtener transcripciones IPA de fuentes externas"""
     
-    def __init__(self, timeout: int = 5):
+    def __init__(self, timeout: int = 5, client: Optional[httpx.AsyncClient] = None):
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'IPA-Transcription-Service/1.0'
-        })
+        # Un cliente inyectado (p. ej. el compartido por la app) lo cierra
+        # quien lo creó; si no se inyecta, el servicio crea y cierra el suyo
+        self._owns_client = client is None
+        self.client = client if client is not None else create_http_client(timeout)
+        # (fuente, palabra) -> (instante de expiración, resultado)
+        self._cache: OrderedDict = OrderedDict()
+    
+    def _cache_get(self, source: str, word: str) -> Any:
+        """Devuelve el resultado cacheado o _MISS si no existe o ha expirado"""
+        key = (source, word)
+        entry = self._cache.get(key)
+        if entry is None:
+            return _MISS
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return _MISS
+        self._cache.move_to_end(key)
+        return result
+    
+    def _cache_put(self, source: str, word: str, result: Optional[Dict[str, Any]]) -> None:
+        """Guarda un resultado (también None: la palabra no está en la fuente)"""
+        key = (source, word)
+        self._cache[key] = (time.monotonic() + _CACHE_TTL_SECONDS, result)
+        self._cache.move_to_end(key)
+        if len(self._cache) > _CACHE_MAX_SIZE:
+            self._cache.popitem(last=False)
+    
+    async def aclose(self) -> None:
+        """Cierra el cliente HTTP y sus conexiones abiertas (solo si es propio)"""
+        if self._owns_client:
+            await self.client.aclose()
     
-    def fetch_from_wiktionary(self, word: str) -> Optional[Dict[str, any]]:
+    async def fetch_from_wiktionary(self, word: str) -> Optional[Dict[str, Any]]:
         """
         Obtiene transcripciones IPA de Wiktionary
         
+        Args:
+            word: Palabra ya en minúsculas (fetch_ipa la normaliza una vez)
+        
         Returns:
             Dict con 'american' y 'rp' o None si no se encuentra
         """
+        cached = self._cache_get('wiktionary', word)
+        if cached is not _MISS:
+            return cached
+        
         try:
-            url = f"https://en.wiktionary.org/api/rest_v1/page/html/{word.lower()}"
-            response = self.session.get(url, timeout=self.timeout)
+            url = f"https://en.wiktionary.org/api/rest_v1/page/html/{word}"
+            response = await self.client.get(url)
             
             if response.status_code != 200:
+                # Un 404 es definitivo; otros códigos pueden ser transitorios
+                if response.status_code == 404:
+                    self._cache_put('wiktionary', word, None)
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Buscar secciones de pronunciación en inglés
-            result = {
-                'american': None,
-                'rp': None
-            }
-            
-            # Buscar todos los spans con clase IPA
-            ipa_spans = soup.find_all('span', class_='IPA')
-            
-            # Buscar contexto de dialecto
-            for ipa_span in ipa_spans:
-                ipa_text = ipa_span.get_text().strip()
-                # Limpiar formato /.../ si existe
-                ipa_text = re.sub(r'^/(.+)/$', r'\1', ipa_text)
-                
-                # Buscar el contexto anterior para identificar el dialecto
-                parent = ipa_span.find_parent()
-                if parent:
-                    context = parent.get_text().lower()
-                    
-                    # Identificar American English
-                    if any(marker in context for marker in ['us', 'general american', 'ga', 'genamer']):
-                        if not result['american']:
-                            result['american'] = ipa_text
-                    
-                    # Identificar British English / RP
-                    elif any(marker in context for marker in ['uk', 'rp', 'received pronunciation', 'british']):
-                        if not result['rp']:
-                            result['rp'] = ipa_text
-            
-            # Si encontramos al menos una transcripción, devolver
-            if result['american'] or result['rp']:
-                return result
-            
-            return None
+            # El parseo es CPU; se hace en un hilo para no bloquear el event loop
+            result = await asyncio.to_thread(self._parse_wiktionary, response.text)
+            self._cache_put('wiktionary', word, result)
+            return result
             
         except Exception as e:
             print(f"Error fetching from Wiktionary: {e}")
             return None
     
-    def fetch_from_cambridge(self, word: str) -> Optional[Dict[str, any]]:
+    def _parse_wiktionary(self, html: str) -> Optional[Dict[str, Any]]:
+        """Extrae las transcripciones IPA del HTML de Wiktionary (síncrono)"""
+        tree = lxml.html.fromstring(html)
+        
+        # Buscar secciones de pronunciación en inglés
+        result = {
+            'american': None,
+            'rp': None
+        }
+        
+        # Buscar contexto de dialecto en todos los spans con clase IPA
+        for ipa_span in _WIKTIONARY_IPA_SPANS(tree):
+            ipa_text = ipa_span.text_content().strip()
+            # Limpiar formato /.../ si existe
+            ipa_text = _IPA_SLASH_RE.sub(r'\1', ipa_text)
+            
+            # Buscar el contexto anterior para identificar el dialecto
+            parent = ipa_span.getparent()
+            if parent is not None:
+                context = parent.text_content().lower()
+                
+                # Identificar American English
+                if _US_MARKERS_RE.search(context):
+                    if not result['american']:
+                        result['american'] = ipa_text
+                
+                # Identificar British English / RP
+                elif _UK_MARKERS_RE.search(context):
+                    if not result['rp']:
+                        result['rp'] = ipa_text
+            
+            # Ambos acentos encontrados: el resto de spans no cambia el resultado
+            if result['american'] and result['rp']:
+                break
+        
+        # Si encontramos al menos una transcripción, devolver
+        if result['american'] or result['rp']:
+            return result
+        
+        return None
+    
+    async def fetch_from_cambridge(self, word: str) -> Optional[Dict[str, Any]]:
         """
         Obtiene transcripciones IPA de Cambridge Dictionary
         
+        Args:
+            word: Palabra ya en minúsculas (fetch_ipa la normaliza una vez)
+        
         Returns:
             Dict con 'american' y 'rp' o None si no se encuentra
         """
+        cached = self._cache_get('cambridge', word)
+        if cached is not _MISS:
+            return cached
+        
         try:
-            url = f"https://dictionary.cambridge.org/dictionary/english/{word.lower()}"
-            response = self.session.get(url, timeout=self.timeout)
+            url = f"https://dictionary.cambridge.org/dictionary/english/{word}"
+            response = await self.client.get(url)
             
             if response.status_code != 200:
+                # Un 404 es definitivo; otros códigos pueden ser transitorios
+                if response.status_code == 404:
+                    self._cache_put('cambridge', word, None)
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            result = {
-                'american': None,
-                'rp': None
-            }
-            
-            # Buscar pronunciaciones en Cambridge
-            # Cambridge usa span class="ipa" dentro de divs con class="us dpron-i" y "uk dpron-i"
-            
-            # UK/RP pronunciation
-            uk_section = soup.find('span', class_='uk')
-            if uk_section:
-                ipa_span = uk_section.find('span', class_='ipa')
-                if ipa_span:
-                    ipa_text = ipa_span.get_text().strip()
-                    ipa_text = re.sub(r'^/(.+)/$', r'\1', ipa_text)
-                    result['rp'] = ipa_text
-            
-            # US pronunciation
-            us_section = soup.find('span', class_='us')
-            if us_section:
-                ipa_span = us_section.find('span', class_='ipa')
-                if ipa_span:
-                    ipa_text = ipa_span.get_text().strip()
-                    ipa_text = re.sub(r'^/(.+)/$', r'\1', ipa_text)
-                    result['american'] = ipa_text
-            
-            if result['american'] or result['rp']:
-                return result
-            
-            return None
-            
+            # El parseo es CPU; se hace en un hilo para no bloquear el event loop
+            result = await asyncio.to_thread(self._parse_cambridge, response.text)
+            self._cache_put('cambridge', word, result)
+            return result
+        
         except Exception as e:
             print(f"Error fetching from Cambridge: {e}")
             return None
     
-    def fetch_ipa(self, word: str) -> List[Dict[str, any]]:
+    def _parse_cambridge(self, html: str) -> Optional[Dict[str, Any]]:
+        """Extrae las transcripciones IPA del HTML de Cambridge (síncrono)"""
+        tree = lxml.html.fromstring(html)
+        
+        result = {
+            'american': None,
+            'rp': None
+        }
+        
+        # Buscar pronunciaciones en Cambridge
+        # Cambridge usa span class="ipa" dentro de divs con class="us dpron-i" y "uk dpron-i"
+        for key, xpath in (('rp', _CAMBRIDGE_UK_IPA), ('american', _CAMBRIDGE_US_IPA)):
+            ipa_spans = xpath(tree)
+            if ipa_spans:
+                ipa_text = ipa_spans[0].text_content().strip()
+                result[key] = _IPA_SLASH_RE.sub(r'\1', ipa_text)
+        
+        if result['american'] or result['rp']:
+            return result
+        
+        return None
+    
+    async def fetch_ipa(self, word: str) -> List[Dict[str, Any]]:
         """
         Obtiene IPA de múltiples fuentes simultáneamente
         
+        Args:
+            word: Palabra tal como llega; se pasa a minúsculas una sola vez aquí
+        
         Returns:
             Lista de resultados de diferentes fuentes
         """
         results = []
+        word = word.lower()
         
-        # Ejecutar consultas en paralelo
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            # Iniciar consultas
-            future_wiktionary = executor.submit(self.fetch_from_wiktionary, word)
-            future_cambridge = executor.submit(self.fetch_from_cambridge, word)
-            
-            # Recoger resultados de Wiktionary
-            try:
-                wiktionary_data = future_wiktionary.result()
-                if wiktionary_data:
-                    results.append({
-                        'source': 'wiktionary',
-                        'data': wiktionary_data
-                    })
-            except Exception as e:
-                print(f"Wiktionary fetch failed: {e}")
-            
-            # Recoger resultados de Cambridge
-            try:
-                cambridge_data = future_cambridge.result()
-                if cambridge_data:
-                    results.append({
-                        'source': 'cambridge',
-                        'data': cambridge_data
-                    })
-            except Exception as e:
-                print(f"Cambridge fetch failed: {e}")
+        # Ejecutar consultas en paralelo sobre el event loop
+        wiktionary_data, cambridge_data = await asyncio.gather(
+            self.fetch_from_wiktionary(word),
+            self.fetch_from_cambridge(word),
+            return_exceptions=True,
+        )
+        
+        # Recoger resultados de Wiktionary
+        if isinstance(wiktionary_data, BaseException):
+            print(f"Wiktionary fetch failed: {wiktionary_data}")
+        elif wiktionary_data:
+            results.append({
+                'source': 'wiktionary',
+                'data': wiktionary_data
+            })
+        
+        # Recoger resultados de Cambridge
+        if isinstance(cambridge_data, BaseException):
+            print(f"Cambridge fetch failed: {cambridge_data}")
+        elif cambridge_data:
+            results.append({
+                'source': 'cambridge',
+                'data': cambridge_data
+            })
         
         return results
 
-
-def create_fallback_service(timeout: int = 5) -> ExternalIPAFallback:
-    """Factory para crear el servicio de fallback"""
-    return ExternalIPAFallback(timeout=timeout)
+def create_fallback_service(timeout: int = 5,
+                            client: Optional[httpx.AsyncClient] = None) -> ExternalIPAFallback:
+    """Factory para crear el servicio de fallback (opcionalmente con un cliente compartido)"""
+    return ExternalIPAFallback(timeout=timeout, client=client)
@@ -2,23 +2,64 @@
 FastAPI Server for IPA Transcription API
 Lógica del servidor separada de la lógica de transcripciones.
 """
-from fastapi import FastAPI, Query, HTTPException
+import asyncio
+import secrets
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from fastapi import FastAPI, Query, HTTPException, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional
 
-import sys
-import os
-sys.path.append(os.path.dirname(__file__))
 from transcription_service_modular import create_transcription_service
-from external_fallback import create_fallback_service
+from external_fallback import create_fallback_service, create_http_client
 from config import config
 
+# Initialize transcription service
+transcription_service = create_transcription_service()
+
+# Longer texts bypass the memo cache, so its 4096 entries stay bounded in size
+_CACHE_MAX_TEXT_LENGTH = 1000
+
+
+@lru_cache(maxsize=4096)
+def _cached_transcribe(text: str, accent: str, use_weak: bool) -> dict:
+    """
+    Memoized transcribe_text: clients often re-send the same sentences
+    
+    The result only depends on the arguments and the in-memory copy of the
+    database, so it stays valid until that copy is reloaded (POST
+    /cache/reload clears it then). Callers must not mutate the returned dict.
+    """
+    return transcription_service.transcribe_text(text=text, accent=accent, use_weak=use_weak)
+
+
+def _transcribe(text: str, accent: str, use_weak: bool) -> dict:
+    """Transcribe through the memo cache unless the text is too long to keep"""
+    if len(text) > _CACHE_MAX_TEXT_LENGTH:
+        return transcription_service.transcribe_text(text=text, accent=accent, use_weak=use_weak)
+    return _cached_transcribe(text, accent, use_weak)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one pooled HTTP client for the external fallbacks while the app runs"""
+    # Created inside the running event loop and closed on shutdown together
+    # with its pooled connections
+    async with create_http_client(timeout=5) as client:
+        app.state.fallback_service = create_fallback_service(timeout=5, client=client)
+        yield
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title=config.API_TITLE,
     description=config.API_DESCRIPTION,
-    version=config.API_VERSION
+    version=config.API_VERSION,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS configuration from environment
@@ -30,13 +71,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize transcription service
-transcription_service = create_transcription_service()
-
-# Initialize external fallback service
-fallback_service = create_fallback_service(timeout=5)
-
 
+# Plain pydantic v2 model on purpose: validation runs in pydantic-core (Rust)
+# and costs about a microsecond per request, far below the routing overhead,
+# so a msgspec Struct or a hand-decoded body would only cost the OpenAPI schema
 class TranscribeRequest(BaseModel):
     text: str
     accent: str = "american"  # 'american' | 'rp'
@@ -46,7 +84,7 @@ class TranscribeRequest(BaseModel):
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     """Root endpoint with API info"""
     return {
         "message": "IPA Transcription API",
@@ -54,58 +92,69 @@ def read_root():
         "endpoints": {
             "transcribe": "POST /transcribe - Transcribe text to IPA",
             "ipa": "GET /ipa?word={word}&accent={accent} - Get IPA for single word",
-            "health": "GET /health - Health check"
+            "health": "GET /health - Health check",
+            "cache": "POST /cache/reload - Reload the database and drop cached transcriptions (admin token)"
         }
     }
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "ipa-transcription-api"}
 
 
 @app.get("/ipa")
-def get_ipa(word: str = Query(..., description="Word to transcribe")):
+async def get_ipa(request: Request, word: str = Query(..., description="Word to transcribe")):
     """Get all IPA transcription forms for a single word from multiple sources"""
     try:
         sources = []
+        fallback_service = request.app.state.fallback_service
         
-        # 1. Obtener de la base de datos local
-        ipa_american_raw = transcription_service.db_lookup(word, 'american')
-        ipa_rp_raw = transcription_service.db_lookup(word, 'rp')
-        
-        if ipa_american_raw or ipa_rp_raw:
-            db_result = {
-                "source": "database",
-                "american": None,
-                "rp": None
-            }
+        # Lanzar las fuentes externas ya, para que la red avance mientras se
+        # procesa la DB local (fetch_ipa y db_lookup normalizan a minúsculas)
+        external_task = asyncio.create_task(fallback_service.fetch_ipa(word))
+        try:
+            # 1. Obtener de la base de datos local
+            ipa_american_raw = transcription_service.db_lookup(word, 'american')
+            ipa_rp_raw = transcription_service.db_lookup(word, 'rp')
             
-            # Process American accent
-            if ipa_american_raw:
-                corrected = transcription_service.apply_character_corrections(ipa_american_raw, 'american')
-                db_result["american"] = corrected
-            
-            # Process RP accent with weak/strong forms
-            if ipa_rp_raw:
-                parsed = transcription_service.parse_weak_strong_format(ipa_rp_raw)
+            if ipa_american_raw or ipa_rp_raw:
+                db_result = {
+                    "source": "database",
+                    "american": None,
+                    "rp": None
+                }
+                
+                # Process American accent
+                if ipa_american_raw:
+                    corrected = transcription_service.apply_character_corrections(ipa_american_raw, 'american')
+                    db_result["american"] = corrected
                 
-                if 'strong' in parsed and 'weak' in parsed:
-                    strong = transcription_service.apply_character_corrections(parsed['strong'], 'rp')
-                    weak = transcription_service.apply_character_corrections(parsed['weak'], 'rp')
-                    db_result["rp"] = {
-                        "strong": strong,
-                        "weak": weak
-                    }
-                elif 'single' in parsed:
-                    single = transcription_service.apply_character_corrections(parsed['single'], 'rp')
-                    db_result["rp"] = single
+                # Process RP accent with weak/strong forms
+                if ipa_rp_raw:
+                    parsed = transcription_service.parse_weak_strong_format(ipa_rp_raw)
+                    
+                    if 'strong' in parsed and 'weak' in parsed:
+                        strong = transcription_service.apply_character_corrections(parsed['strong'], 'rp')
+                        weak = transcription_service.apply_character_corrections(parsed['weak'], 'rp')
+                        db_result["rp"] = {
+                            "strong": strong,
+                            "weak": weak
+                        }
+                    elif 'single' in parsed:
+                        single = transcription_service.apply_character_corrections(parsed['single'], 'rp')
+                        db_result["rp"] = single
+                
+                sources.append(db_result)
             
-            sources.append(db_result)
-        
-        # 2. Obtener de fuentes externas (siempre)
-        external_results = fallback_service.fetch_ipa(word)
+            # 2. Obtener de fuentes externas (siempre)
+            external_results = await external_task
+        finally:
+            # Si algo falla antes del await, no dejar las peticiones externas
+            # corriendo sin que nadie recoja su resultado
+            if not external_task.done():
+                external_task.cancel()
         
         for ext_result in external_results:
             source_data = {
@@ -128,11 +177,12 @@ def get_ipa(word: str = Query(..., description="Word to transcribe")):
             
             sources.append(source_data)
         
-        # Si no se encontró nada en ninguna fuente
+        # Si no se encontró nada en ninguna fuente: misma respuesta que un
+        # HTTPException 404, pero sin pasar por la maquinaria de excepciones
         if not sources:
-            raise HTTPException(
+            return ORJSONResponse(
                 status_code=404,
-                detail=f"Word '{word}' not found in any source."
+                content={"detail": f"Word '{word}' not found in any source."}
             )
         
         return {
@@ -148,7 +198,7 @@ def get_ipa(word: str = Query(..., description="Word to transcribe")):
 
 
 @app.post("/transcribe")
-def post_transcribe(req: TranscribeRequest):
+async def post_transcribe(req: TranscribeRequest):
     """Transcribe full text to IPA with all phonetic rules"""
     try:
         # Validate input
@@ -161,11 +211,13 @@ def post_transcribe(req: TranscribeRequest):
         # Normalize accent
         normalized_accent = 'american' if req.accent.lower().startswith('a') else 'rp'
         
-        # Perform transcription using the service
-        result = transcription_service.transcribe_text(
-            text=req.text,
-            accent=normalized_accent,
-            use_weak= True,
+        # Perform transcription in a worker thread; long texts are CPU-bound
+        # and would otherwise stall every other request on the event loop
+        result = await asyncio.to_thread(
+            _transcribe,
+            req.text,
+            normalized_accent,
+            True,
         )
         
         return {
@@ -184,20 +236,43 @@ def post_transcribe(req: TranscribeRequest):
         raise HTTPException(status_code=500, detail=f"Error transcribing text: {str(e)}")
 
 
+@app.post("/cache/reload")
+async def reload_cache(x_admin_token: Optional[str] = Header(None)):
+    """Reload the database after an update and drop every result derived from it"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Reloading is disabled (ADMIN_TOKEN not set)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    
+    # Re-reading the table is CPU and disk work; keep it off the event loop.
+    # Clear the memo after the reload so no stale result is cached again
+    await asyncio.to_thread(transcription_service.reload_data)
+    info = _cached_transcribe.cache_info()
+    _cached_transcribe.cache_clear()
+    return {
+        "cleared": info.currsize,
+        "total_words": transcription_service.db_service.get_word_count()
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     import socket
     
-    def find_free_port(start_port: int = 8002, max_attempts: int = 10) -> int:
-        """Find a free port starting from start_port"""
-        for port in range(start_port, start_port + max_attempts):
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+    def find_free_port(preferred_port: int = 8002) -> int:
+        """Return preferred_port if it is free, otherwise a kernel-assigned free port"""
+        # One probe socket for every attempt (a failed bind leaves it unbound).
+        # SO_REUSEADDR matches what uvicorn sets, so a port whose previous
+        # server left connections in TIME_WAIT is not reported as busy
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            for port in (preferred_port, 0):
                 try:
                     s.bind((config.HOST, port))
-                    return port
+                    return s.getsockname()[1]
                 except OSError:
                     continue
-        raise RuntimeError(f"Could not find a free port after {max_attempts} attempts")
+        raise RuntimeError("Could not find a free port")
     
     port = find_free_port(config.PORT)
     if port != config.PORT:
@@ -3,13 +3,30 @@ Phonetic Rules Module
 Contains all phonetic rules for weak forms, strong forms, and contextual analysis.
 """
 import re
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 from abc import ABC, abstractmethod
 
 
+# Compiled once at import; used by every rule to normalise tokens
+_CLEAN_RE = re.compile(r"[^\w']")
+_PUNCT_RE = re.compile(r"^[.,!?;:'-]+$")
+
+
+@lru_cache(maxsize=8192)
+def _clean_token(word: str) -> str:
+    """Lowercase a token and strip everything except word characters and apostrophes"""
+    return _CLEAN_RE.sub('', word.lower())
+
+
 class PhoneticRule(ABC):
     """Abstract base class for phonetic rules"""
     
+    # Cleaned word this rule is specific to, if any. Rules that set it must
+    # apply to exactly that word; WeakFormProcessor then finds them by a
+    # dict lookup instead of calling applies_to on every word.
+    word: Optional[str] = None
+    
     @abstractmethod
     def applies_to(self, word: str, context: Dict) -> bool:
         """Check if this rule applies to the given word and context"""
@@ -34,8 +51,10 @@ class ContractionRule(PhoneticRule):
 class TheVariationRule(PhoneticRule):
     """Rule for 'the' allophonic variation"""
     
+    word: Optional[str] = 'the'
+    
     def applies_to(self, word: str, context: Dict) -> bool:
-        return re.sub(r"[^\w']", '', word.lower()) == 'the'
+        return context['clean'] == self.word
     
     def apply(self, word: str, context: Dict) -> bool:
         return False  # Handle specially in post-processing
@@ -44,20 +63,21 @@ class TheVariationRule(PhoneticRule):
 class ThereRule(PhoneticRule):
     """Rule for 'there' - weak when followed by 'to be' verbs"""
     
-    def __init__(self):
-        self.be_verbs = ['is', 'are', 'was', 'were', 'will', 'would', "'s", "'re", "'ll"]
+    word: Optional[str] = 'there'
+    
+    def __init__(self) -> None:
+        self.be_verbs = frozenset({'is', 'are', 'was', 'were', 'will', 'would', "'s", "'re", "'ll"})
     
     def applies_to(self, word: str, context: Dict) -> bool:
-        clean_word = re.sub(r"[^\w']", '', word.lower())
-        return clean_word == 'there'
+        return context['clean'] == self.word
     
     def apply(self, word: str, context: Dict) -> bool:
         word_index = context.get('word_index', 0)
-        words = context.get('words', [])
+        clean_words = context['clean_words']
         
         # Check if followed by 'to be' verb
-        if word_index < len(words) - 1:
-            next_word = re.sub(r"[^\w']", '', words[word_index + 1].lower())
+        if word_index < len(clean_words) - 1:
+            next_word = clean_words[word_index + 1]
             if next_word in self.be_verbs:
                 return True  # Use weak form before 'to be'
         
@@ -67,34 +87,38 @@ class ThereRule(PhoneticRule):
 class ThatRule(PhoneticRule):
     """Rule for 'that' - weak when used as logical conclusion/subordinating conjunction"""
     
-    def __init__(self):
+    word: Optional[str] = 'that'
+    
+    def __init__(self) -> None:
         # Words that often precede 'that' in logical conclusions
-        self.conclusion_indicators = [
+        self.conclusion_indicators = frozenset({
             'know', 'think', 'believe', 'feel', 'say', 'said', 'tell', 'told',
             'see', 'saw', 'hear', 'heard', 'understand', 'realize', 'realized',
             'assume', 'suppose', 'hope', 'wish', 'remember', 'forget', 'noticed',
             'mean', 'means', 'meant', 'show', 'shows', 'showed', 'prove', 'proves'
-        ]
+        })
+        
+        # Pronouns that open a subordinate clause ("that he", "that she", ...)
+        self.clause_subjects = frozenset({'he', 'she', 'it', 'they', 'we', 'you', 'i'})
     
     def applies_to(self, word: str, context: Dict) -> bool:
-        clean_word = re.sub(r"[^\w']", '', word.lower())
-        return clean_word == 'that'
+        return context['clean'] == self.word
     
     def apply(self, word: str, context: Dict) -> bool:
         word_index = context.get('word_index', 0)
-        words = context.get('words', [])
+        clean_words = context['clean_words']
         
         # Check if preceded by a verb that introduces logical conclusions
         if word_index > 0:
-            prev_word = re.sub(r"[^\w']", '', words[word_index - 1].lower())
+            prev_word = clean_words[word_index - 1]
             if prev_word in self.conclusion_indicators:
                 return True  # Use weak form for logical conclusions
         
         # Check if it's followed by a clause (indicating subordinating conjunction)
-        if word_index < len(words) - 2:
+        if word_index < len(clean_words) - 2:
             # Look for patterns like "that he", "that she", "that it", etc.
-            next_word = re.sub(r"[^\w']", '', words[word_index + 1].lower())
-            if next_word in ['he', 'she', 'it', 'they', 'we', 'you', 'i']:
+            next_word = clean_words[word_index + 1]
+            if next_word in self.clause_subjects:
                 return True  # Use weak form for subordinating conjunction
         
         return False  # Use strong form for demonstrative pronoun
@@ -103,49 +127,48 @@ class ThatRule(PhoneticRule):
 class HaveRule(PhoneticRule):
     """Rule for 'have' - strong when main verb (possession/eating/obligation), weak when auxiliary"""
     
-    def __init__(self):
+    word: Optional[str] = 'have'
+    
+    def __init__(self) -> None:
         # Words that indicate 'have' is likely auxiliary (perfect tenses)
-        self.past_participle_indicators = [
+        self.past_participle_indicators = frozenset({
             'been', 'done', 'gone', 'seen', 'said', 'made', 'come', 'taken', 'given',
             'found', 'thought', 'worked', 'called', 'asked', 'looked', 'used', 'tried',
             'left', 'felt', 'kept', 'heard', 'brought', 'written', 'shown', 'moved',
             'played', 'turned', 'started', 'opened', 'closed', 'happened', 'become',
             'known', 'put', 'told', 'helped', 'changed', 'wanted', 'learned', 'lived'
-        ]
+        })
         
         # Infinitive markers that indicate obligation (have to)
-        self.infinitive_markers = ['to']
+        self.infinitive_markers = frozenset({'to'})
+        
+        # Subjects that follow 'have' in auxiliary questions ("Have you done...?")
+        self.question_subjects = frozenset({'you', 'we', 'they', 'i'})
         
         # Direct objects that indicate possession/eating (main verb)
-        self.possession_objects = [
+        self.possession_objects = frozenset({
             'a', 'an', 'the', 'my', 'your', 'his', 'her', 'our', 'their', 'some',
             'money', 'time', 'car', 'house', 'food', 'water', 'coffee', 'tea',
             'breakfast', 'lunch', 'dinner', 'problem', 'question', 'idea', 'plan'
-        ]
+        })
     
     def applies_to(self, word: str, context: Dict) -> bool:
-        clean_word = re.sub(r"[^\w']", '', word.lower())
-        return clean_word == 'have'
+        return context['clean'] == self.word
     
     def apply(self, word: str, context: Dict) -> bool:
         word_index = context.get('word_index', 0)
         words = context.get('words', [])
+        clean_words = context['clean_words']
         
-        # Check if followed by 'to' (obligation: "have to do")
-        if word_index < len(words) - 1:
-            next_word = re.sub(r"[^\w']", '', words[word_index + 1].lower())
-            if next_word == 'to':
-                return False  # Strong form for obligation
-        
-        # Check if followed by direct object (possession/eating)
         if word_index < len(words) - 1:
-            next_word = re.sub(r"[^\w']", '', words[word_index + 1].lower())
-            if next_word in self.possession_objects:
-                return False  # Strong form for possession/eating
-        
-        # Check if followed by past participle (auxiliary for perfect tenses)
-        if word_index < len(words) - 1:
-            next_word = re.sub(r"[^\w']", '', words[word_index + 1].lower())
+            next_word = clean_words[word_index + 1]
+            
+            # Followed by 'to' (obligation: "have to do") or by a direct
+            # object (possession/eating) -> strong form
+            if next_word in self.infinitive_markers or next_word in self.possession_objects:
+                return False
+            
+            # Followed by past participle (auxiliary for perfect tenses)
             if next_word in self.past_participle_indicators:
                 return True  # Weak form for auxiliary
         
@@ -153,8 +176,8 @@ class HaveRule(PhoneticRule):
         # If 'have' is at the beginning of a question, likely auxiliary
         if word_index == 0 and len(words) > 2:
             # "Have you done...?" - auxiliary
-            second_word = re.sub(r"[^\w']", '', words[1].lower())
-            if second_word in ['you', 'we', 'they', 'i']:
+            second_word = clean_words[1]
+            if second_word in self.question_subjects:
                 return True  # Weak form for auxiliary question
         
         # Default: assume main verb (possession/obligation) - strong form
@@ -163,8 +186,7 @@ class HaveRule(PhoneticRule):
     def get_weak_form(self, word: str, context: Dict) -> str:
         """Get appropriate weak form considering H-dropping rules"""
         word_index = context.get('word_index', 0)
-        words = context.get('words', [])
-        punct_re = context.get('punct_re')
+        is_punct = context['is_punct']
         
         # Base weak form without H
         base_weak = 'əv'
@@ -176,15 +198,13 @@ class HaveRule(PhoneticRule):
             return h_weak
         
         # Rule 2: Keep H after pause (punctuation)
-        if word_index > 0 and punct_re:
-            prev_token = words[word_index - 1]
-            if punct_re.match(prev_token):
-                return h_weak
+        if word_index > 0 and is_punct[word_index - 1]:
+            return h_weak
         
         # Rule 3: Keep H after comma, period, etc. (even if not immediately before)
         # Check if there's punctuation in the previous few tokens
         for i in range(max(0, word_index - 2), word_index):
-            if punct_re and punct_re.match(words[i]):
+            if is_punct[i]:
                 return h_weak
         
         # Default: use H-dropped form (əv)
@@ -194,27 +214,34 @@ class HaveRule(PhoneticRule):
 class MustRule(PhoneticRule):
     """Rule for 'must' - complex contextual and phonetic rules"""
     
-    def __init__(self):
+    word: Optional[str] = 'must'
+    
+    def __init__(self) -> None:
         # Vowel sounds that trigger weak form with /t/
-        self.vowel_sounds = ['æ', 'ɑ', 'ɒ', 'ɔ', 'ʊ', 'u', 'ɪ', 'i', 'e', 'ə', 'ʌ', 'ɜ', 'a', 'ɛ', 'o']
+        self.vowel_sounds = frozenset({'æ', 'ɑ', 'ɒ', 'ɔ', 'ʊ', 'u', 'ɪ', 'i', 'e', 'ə', 'ʌ', 'ɜ', 'a', 'ɛ', 'o'})
+        
+        # Spelling of next word that keeps the /t/ (vowels, 'y' approximating /j/)
+        self.vowel_letters = frozenset('aeiouy')
         
         # Consonant sounds that trigger t-dropping in weak form
-        self.consonant_sounds = [
+        self.consonant_sounds = frozenset({
             'b', 'p', 'd', 't', 'g', 'k', 'f', 'v', 'θ', 'ð', 's', 'z', 'ʃ', 'ʒ', 
             'h', 'm', 'n', 'ŋ', 'l', 'r', 'w', 'ʧ', 'ʤ'
-        ]
+        })
         
         # Words that indicate obligation (strong form)
-        self.obligation_indicators = [
+        self.obligation_indicators = frozenset({
             'always', 'never', 'really', 'definitely', 'absolutely', 'certainly'
-        ]
+        })
         
         # Weak forms of 'have' that trigger strong 'must'
-        self.weak_have_forms = ['əv', 'həv']
+        self.weak_have_forms = frozenset({'əv', 'həv'})
+        
+        # Participles that make "must have ..." an obligation (strong form)
+        self.common_participles = frozenset({'done', 'been', 'gone', 'seen', 'said'})
     
     def applies_to(self, word: str, context: Dict) -> bool:
-        clean_word = re.sub(r"[^\w']", '', word.lower())
-        return clean_word == 'must'
+        return context['clean'] == self.word
     
     def apply(self, word: str, context: Dict) -> bool:
         word_index = context.get('word_index', 0)
@@ -227,8 +254,7 @@ class MustRule(PhoneticRule):
             if 'have' in next_word and len(words) > word_index + 2:
                 # If "must have done" pattern -> likely strong for obligation
                 potential_participle = words[word_index + 2].lower()
-                common_participles = ['done', 'been', 'gone', 'seen', 'said']
-                if potential_participle in common_participles:
+                if potential_participle in self.common_participles:
                     return False  # Strong form
         
         # Check for obligation context (preceded by strong indicators)
@@ -243,23 +269,21 @@ class MustRule(PhoneticRule):
     def get_weak_form(self, word: str, context: Dict) -> str:
         """Get appropriate weak form considering phonetic environment"""
         word_index = context.get('word_index', 0)
-        words = context.get('words', [])
+        clean_words = context['clean_words']
         
         # Base weak forms
         weak_with_t = 'məst'  # Before vowels and /j/
         weak_without_t = 'məs'  # Before consonants
         
         # Check what follows 'must'
-        if word_index < len(words) - 1:
-            next_word = words[word_index + 1]
-            
+        if word_index < len(clean_words) - 1:
             # Get first sound of next word (simplified)
-            next_clean = re.sub(r"[^\w']", '', next_word.lower())
+            next_clean = clean_words[word_index + 1]
             if next_clean:
                 first_char = next_clean[0]
                 
                 # If starts with vowel or 'y' (approximating /j/) -> keep /t/
-                if first_char in 'aeiouy':
+                if first_char in self.vowel_letters:
                     return weak_with_t
                 
                 # If starts with consonant -> drop /t/
@@ -273,35 +297,27 @@ class MustRule(PhoneticRule):
 class PositionalRule(PhoneticRule):
     """Rule for positional strong forms"""
     
-    def __init__(self):
-        self.weak_at_start = ['the', 'a', 'an']
-        self.auxiliaries = ['is', 'are', 'was', 'were', 'have', 'has', 'had', 'do', 'does', 'did',
-                           'will', 'would', 'can', 'could', 'should', 'must']
+    def __init__(self) -> None:
+        self.weak_at_start = frozenset({'the', 'a', 'an'})
     
     def applies_to(self, word: str, context: Dict) -> bool:
         return True  # This rule always applies
     
     def apply(self, word: str, context: Dict) -> bool:
-        clean_word = re.sub(r"[^\w']", '', word.lower())
         word_index = context.get('word_index', 0)
-        words = context.get('words', [])
-        punct_re = context.get('punct_re')
+        last_index = len(context.get('words', [])) - 1
         
-        # First word tends to be strong (except special cases)
-        if word_index == 0:
-            if clean_word not in self.weak_at_start:
-                return False
-        
-        # Strong before pause (comma, period, etc.)
-        if word_index < len(words) - 1 and punct_re and punct_re.match(words[word_index + 1] or ''):
+        # Cheap boundary checks first.
+        # First word tends to be strong, except the articles in weak_at_start
+        if word_index == 0 and context['clean'] not in self.weak_at_start:
             return False
         
         # Last word tends to be strong
-        if word_index == len(words) - 1:
+        if word_index == last_index:
             return False
         
-        # Auxiliaries at start of questions are strong
-        if clean_word in self.auxiliaries and word_index == 0:
+        # Strong before pause (comma, period, etc.)
+        if word_index < last_index and context['is_punct'][word_index + 1]:
             return False
         
         return True  # Use weak form
@@ -310,7 +326,7 @@ class PositionalRule(PhoneticRule):
 class WeakFormProcessor:
     """Processor for determining weak vs strong forms"""
     
-    def __init__(self):
+    def __init__(self) -> None:
         self.rules = [
             ContractionRule(),
             TheVariationRule(),
@@ -320,9 +336,12 @@ class WeakFormProcessor:
             MustRule(),
             PositionalRule(),
         ]
-        self.punct_re = re.compile(r"^[.,!?;:'-]+$")
+        self.punct_re = _PUNCT_RE
+        self._rebuild_dispatch()
     
-    def should_use_weak(self, word: str, word_index: int, words: List[str]) -> bool:
+    def should_use_weak(self, word: str, word_index: int, words: List[str],
+                        clean_words: Optional[List[str]] = None,
+                        is_punct: Optional[List[bool]] = None) -> bool:
         """
         Determine if a word should use its weak form
         
@@ -330,34 +349,80 @@ class WeakFormProcessor:
             word: The word to analyze
             word_index: Position of word in sentence
             words: All words in the sentence
+            clean_words: Precomputed cleaned form of every word (optional)
+            is_punct: Precomputed punctuation flag for every word (optional)
             
         Returns:
             True if weak form should be used
         """
-        context = {
-            'word_index': word_index,
-            'words': words,
-            'punct_re': self.punct_re
-        }
-        
-        # Apply rules in order - first matching rule wins
-        for rule in self.rules:
+        context = self.build_context(word, word_index, words, clean_words, is_punct)
+        
+        # Apply rules in order - first matching rule wins. Word-specific rules
+        # are looked up directly and only compete with the generic rules that
+        # come before them.
+        keyed = self._dispatch.get(context['clean'])
+        for position, rule in self._generic_rules:
+            if keyed is not None and keyed[0] < position:
+                break
             if rule.applies_to(word, context):
                 return rule.apply(word, context)
         
+        if keyed is not None:
+            return keyed[1].apply(word, context)
+        
         # Default: use weak form in non-prominent positions
         return True
     
-    def add_rule(self, rule: PhoneticRule, position: int = -1):
+    def build_context(self, word: str, word_index: int, words: List[str],
+                      clean_words: Optional[List[str]] = None,
+                      is_punct: Optional[List[bool]] = None) -> Dict:
+        """
+        Build the context dict shared by all rules for one word
+        
+        The cleaned form of the word is computed once here so that rules
+        don't each repeat the normalisation. Callers processing a whole
+        sentence should pass `clean_words`/`is_punct` (see `prepare_words`)
+        so neighbours are not re-cleaned for every word.
+        """
+        if clean_words is None or is_punct is None:
+            clean_words, is_punct = self.prepare_words(words)
+        return {
+            'word_index': word_index,
+            'words': words,
+            'clean': _clean_token(word),
+            'clean_words': clean_words,
+            'is_punct': is_punct,
+            'punct_re': self.punct_re
+        }
+    
+    def prepare_words(self, words: List[str]) -> Tuple[List[str], List[bool]]:
+        """Compute cleaned forms and punctuation flags for a whole sentence once"""
+        clean_words = [_clean_token(w) for w in words]
+        is_punct = [bool(self.punct_re.match(w)) for w in words]
+        return clean_words, is_punct
+    
+    def add_rule(self, rule: PhoneticRule, position: int = -1) -> None:
         """Add a new rule at specified position"""
         if position == -1:
             self.rules.append(rule)
         else:
             self.rules.insert(position, rule)
+        self._rebuild_dispatch()
     
-    def remove_rule(self, rule_class):
+    def remove_rule(self, rule_class: type) -> None:
         """Remove a rule by class type"""
         self.rules = [rule for rule in self.rules if not isinstance(rule, rule_class)]
+        self._rebuild_dispatch()
+    
+    def _rebuild_dispatch(self) -> None:
+        """Index word-specific rules by word, keeping each rule's position"""
+        self._dispatch: Dict[str, Tuple[int, PhoneticRule]] = {}
+        self._generic_rules: List[Tuple[int, PhoneticRule]] = []
+        for position, rule in enumerate(self.rules):
+            if rule.word is None:
+                self._generic_rules.append((position, rule))
+            else:
+                self._dispatch.setdefault(rule.word, (position, rule))
 
 
 class WeakStrongParser:
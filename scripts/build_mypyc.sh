@@ -0,0 +1,17 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# Compile the legacy transcription hot loop (tokenize -> rules -> lookup ->
+# join) into a C extension with mypyc. When the compiled module sits next to
+# transcription_service.py, Python imports it instead of the .py source.
+# phonetic_rules.py is type-checked but left interpreted so custom
+# PhoneticRule subclasses can still be added at runtime.
+cd "$(dirname "$0")/.."
+
+echo "Type-checking transcription_service.py and phonetic_rules.py..."
+uv run --with mypy mypy --check-untyped-defs transcription_service.py phonetic_rules.py
+
+echo "Compiling transcription_service.py with mypyc..."
+uv run --with mypy mypyc transcription_service.py
+
+echo "Done. Delete transcription_service.*.so to go back to pure Python."
@@ -0,0 +1,28 @@
+"""
+Regression tests for the legacy IPATranscriptionService
+"""
+import pytest
+
+from transcription_service import create_transcription_service
+
+
+@pytest.fixture(scope='module')
+def service():
+    return create_transcription_service()
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('either end', 'ˈaɪ.ðə end'),
+    ('either is', 'ˈaɪ.ðə ɪz'),
+    ('neither of us', 'ˈnaɪ.ðə ʌv əs'),
+    ('zither is', 'ˈzɪ.ðə ɪz'),
+])
+def test_the_variation_leaves_word_internal_schwa(service, text, expected):
+    # Only the article "the" becomes /ði/ before a vowel; a final /ðə/
+    # inside another word (either, neither, zither) stays unchanged
+    assert service.transcribe_text(text, 'american', True)['transcription'] == expected
+
+
+@pytest.mark.parametrize('accent', ['american', 'rp'])
+def test_the_variation_before_vowel(service, accent):
+    assert service.transcribe_text('the end', accent, True)['transcription'] == 'ði end'
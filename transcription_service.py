@@ -5,24 +5,151 @@ Separado de la lógica del servidor FastAPI.
 """
 import sqlite3
 import re
-from typing import Optional, List, Dict
-import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Optional, List, Dict, Sequence, Tuple
+
+from config import resolve_database_path
+
+
+# Patterns compiled once at import instead of on every call
+# Same tokens as r"\b\w+'\w+\b|\b\w+\b|[.,!?;:'-]": greedy \w+ always stops at a
+# word boundary, so the \b assertions and the retried alternative are redundant
+_TOKEN_RE = re.compile(r"\w+(?:'\w+)?|[.,!?;:'-]")
+_PUNCT_RE = re.compile(r"^[.,!?;:'-]+$")
+_CLEAN_RE = re.compile(r"[^\w']")
+_NON_WORD_RE = re.compile(r'[^\w]')
+_SPACE_PUNCT_RE = re.compile(r"\s+([.,!?;:'-])")
+# Conjuntos de caracteres para detectar vocales al final / al inicio
+_VOWEL_END_CHARS = frozenset('æɑɒɔʊuɪieoəʌɜɪaʊɔɪɛœ')
+_VOWEL_START_CHARS = frozenset('æɑɒɔʊʉuiɪeəʌɜoɘaɪaʊɔɪɜɟɨɪəeəʊəɛʎœɶɨɘɵɯɤɦɐʉɦɜɽɨɘɵɯɤ')
+# Sonidos iniciales que convierten "the" /ðə/ en /ði/
+_THE_VOWELS = frozenset('æɑɒɔʊuiɪeəʌɜaɛ')
+
+# Símbolos de puntuación en estilo RP
+_RP_SYMBOLS = {
+    '!': '(!)',
+    '?': '(?)',
+    '.': ' //',
+    ',': ' /',
+}
+_RP_SYMBOL_RE = re.compile(r'[!?.,]')
+
+# Las palabras más frecuentes se repiten mucho; cachear evita repetir SQL y regex
+_LOOKUP_CACHE_SIZE = 50000
+
+# SQLite limita el número de parámetros por consulta (999 en versiones antiguas)
+_MAX_SQL_PARAMS = 900
+
+
+# Correcciones de un solo carácter: una pasada con str.translate
+_BASE_TRANS = str.maketrans({
+    '/': None,   # Remove slashes from Kaikki data
+    'ɹ': 'r',    # Use r instead of ɹ
+    'ɛ': 'e',    # Use e instead of ɛ
+    'ɐ': 'ə',    # Normalize schwa
+})
+_AMERICAN_TRANS = str.maketrans({
+    '/': None,
+    'ɹ': 'r',
+    'ɛ': 'e',
+    'ɐ': 'ə',
+    'ɒ': 'ɑ',    # LOT vowel
+})
+
+# Correcciones de varios caracteres (American) en una sola pasada de regex.
+# Equivale a aplicar los replace en orden əʊ, ɪə, eə, ʊə, ɜː y luego la
+# rótica: una ə seguida de ʊ pertenece a GOAT, y 'əʊə' sigue convirtiendo
+# la ʊə final en CURE.
+_AMERICAN_MULTI = {
+    'əʊə': 'oʊr',
+    'əʊ': 'oʊ',    # GOAT vowel
+    'ɪə': 'ɪr',    # NEAR
+    'eə': 'er',    # SQUARE
+    'ʊə': 'ʊr',    # CURE
+    'ɜː': 'ɜr',    # NURSE
+    'ɑː': 'ɑr',    # Rhotic (only before whitespace or at the end)
+}
+_AMERICAN_MULTI_RE = re.compile(r'əʊə(?!ʊ)|əʊ|ɪə(?!ʊ)|eə(?!ʊ)|ʊə(?!ʊ)|ɜː|ɑː(?=\s|$)')
+
+
+# Una versión especializada por acento: el acento se elige una vez por texto
+# y no en cada palabra. Son funciones puras, así que se memorizan.
+@lru_cache(maxsize=10000)
+def _correct_american(text: str) -> str:
+    """Apply American character corrections"""
+    corrected = text.translate(_AMERICAN_TRANS)
+    return _AMERICAN_MULTI_RE.sub(lambda m: _AMERICAN_MULTI[m.group(0)], corrected)
+
+
+@lru_cache(maxsize=10000)
+def _correct_rp(text: str) -> str:
+    """Apply RP character corrections"""
+    return text.translate(_BASE_TRANS)
 
 
 class IPATranscriptionService:
     """Servicio de transcripción IPA con todas las reglas fonéticas"""
     
-    def __init__(self, db_path: str):
+    # Conjuntos fijos usados por should_use_weak (búsqueda O(1))
+    ALWAYS_STRONG = frozenset({'i', 'my', 'may', 'might', 'ought', 'by', 'so', 'while'})
+    WEAK_AT_START = frozenset({'the', 'a', 'an', 'there'})
+    AUXILIARIES = frozenset({'is', 'are', 'was', 'were', 'have', 'has', 'had', 'do', 'does', 'did',
+                             'will', 'would', 'can', 'could', 'should', 'must'})
+    LINKING_R_EXCEPTIONS = frozenset({'more', 'sure', 'pure'})  # Words that already have R in RP
+    
+    def __init__(self, db_path: str) -> None:
         self.db_path = db_path
-        self.punct_re = re.compile(r"^[.,!?;:'-]+$")
+        self.punct_re = _PUNCT_RE
+        # Una conexión persistente por hilo (FastAPI usa un threadpool)
+        self._local = threading.local()
+        # Memo LRU compartido por db_lookup y db_lookup_many: (palabra, acento)
+        # -> IPA, también None para palabras que no están en la DB
+        self._lookup_cache: OrderedDict[Tuple[str, str], Optional[str]] = OrderedDict()
+        self._lookup_lock = threading.Lock()
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """Return this thread's read-only connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA query_only=1")
+            conn.execute("PRAGMA cache_size=-20000")
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._local.conn = conn
+        return conn
+    
+    def _cache_get(self, key: Tuple[str, str]) -> Tuple[bool, Optional[str]]:
+        """Return (hit, ipa) from the shared lookup memo"""
+        with self._lookup_lock:
+            if key not in self._lookup_cache:
+                return False, None
+            self._lookup_cache.move_to_end(key)
+            return True, self._lookup_cache[key]
+    
+    def _cache_put(self, key: Tuple[str, str], ipa: Optional[str]) -> None:
+        """Store a lookup result, evicting the least recently used entry"""
+        with self._lookup_lock:
+            self._lookup_cache[key] = ipa
+            self._lookup_cache.move_to_end(key)
+            if len(self._lookup_cache) > _LOOKUP_CACHE_SIZE:
+                self._lookup_cache.popitem(last=False)
     
     def db_lookup(self, word: str, accent: str) -> Optional[str]:
-        """Lookup word in database"""
-        conn = sqlite3.connect(self.db_path)
-        cur = conn.cursor()
-        cur.execute("SELECT us, gb FROM ipa WHERE word=?", (word.lower(),))
-        row = cur.fetchone()
-        conn.close()
+        """Lookup word in database (memoized per lowercased word and accent)"""
+        key = (word.lower(), accent)
+        hit, ipa = self._cache_get(key)
+        if not hit:
+            ipa = self._query_word(key[0], accent)
+            self._cache_put(key, ipa)
+        return ipa
+    
+    def _query_word(self, word_lower: str, accent: str) -> Optional[str]:
+        """Uncached single-word query behind db_lookup"""
+        row = self._get_connection().execute(
+            "SELECT us, gb FROM ipa WHERE word=?", (word_lower,)
+        ).fetchone()
         
         if not row:
             return None
@@ -32,6 +159,50 @@ class IPATranscriptionService:
             return us or gb
         return gb or us
     
+    def db_lookup_many(self, words: List[str], accent: str) -> Dict[str, str]:
+        """
+        Lookup several words, querying only the ones missing from the memo
+        
+        Words already resolved (by db_lookup or an earlier batch) come from the
+        shared memo; the rest are fetched with one query per chunk of
+        parameters and written back, misses included.
+        
+        Returns:
+            Dict mapping lowercased word -> IPA for the words that were found
+        """
+        found: Dict[str, str] = {}
+        missing: List[str] = []
+        
+        for word in {w.lower() for w in words}:
+            hit, ipa = self._cache_get((word, accent))
+            if not hit:
+                missing.append(word)
+            elif ipa:
+                found[word] = ipa
+        
+        if not missing:
+            return found
+        
+        conn = self._get_connection()
+        fetched: Dict[str, Optional[str]] = {}
+        
+        for start in range(0, len(missing), _MAX_SQL_PARAMS):
+            batch = missing[start:start + _MAX_SQL_PARAMS]
+            placeholders = ','.join('?' * len(batch))
+            rows = conn.execute(
+                f"SELECT word, us, gb FROM ipa WHERE word IN ({placeholders})", batch
+            ).fetchall()
+            for word, us, gb in rows:
+                fetched[word] = (us or gb) if accent == 'american' else (gb or us)
+        
+        for word in missing:
+            ipa = fetched.get(word)
+            self._cache_put((word, accent), ipa)
+            if ipa:
+                found[word] = ipa
+        
+        return found
+    
     def parse_weak_strong_format(self, ipa_text: str) -> Dict[str, str]:
         """Parse formato / [strong], [weak] / y devolver dict con formas"""
         if not ipa_text or not ipa_text.startswith('/ ') or not ipa_text.endswith(' /'):
@@ -46,13 +217,14 @@ class IPATranscriptionService:
         else:
             return {'single': content.strip()}
     
-    def should_use_weak(self, word: str, idx: int, words: List[str]) -> bool:
+    def should_use_weak(self, word: str, idx: int, words: List[str],
+                        clean_words: Optional[List[str]] = None,
+                        is_punct: Optional[Sequence[int]] = None) -> bool:
         """Improved weak forms logic based on frontend rules"""
-        w = re.sub(r"[^\w']", '', word.lower())
+        w = clean_words[idx] if clean_words is not None else _CLEAN_RE.sub('', word.lower())
         
         # Rule 1: Words that are ALWAYS strong
-        always_strong = ['i', 'my', 'may', 'might', 'ought', 'by', 'so', 'while']
-        if w in always_strong:
+        if w in self.ALWAYS_STRONG:
             return False
         
         # Rule 2: Contractions are already in weak form
@@ -65,12 +237,12 @@ class IPATranscriptionService:
         
         # Rule 4: First word tends to be strong (except "the", "a", "an", "there")
         if idx == 0:
-            weak_at_start = ['the', 'a', 'an', 'there']
-            if w not in weak_at_start:
+            if w not in self.WEAK_AT_START:
                 return False
         
         # Rule 5: Strong before pause (comma, period, etc.)
-        if idx < len(words) - 1 and self.punct_re.match(words[idx+1] or ''):
+        if idx < len(words) - 1 and (is_punct[idx+1] if is_punct is not None
+                                     else self.punct_re.match(words[idx+1] or '')):
             return False
         
         # Rule 6: Last word tends to be strong
@@ -78,17 +250,25 @@ class IPATranscriptionService:
             return False
         
         # Rule 7: Auxiliaries at start of questions are strong
-        auxiliaries = ['is', 'are', 'was', 'were', 'have', 'has', 'had', 'do', 'does', 'did',
-                       'will', 'would', 'can', 'could', 'should', 'must']
-        if w in auxiliaries and idx == 0:
+        if w in self.AUXILIARIES and idx == 0:
             return False
         
         # Rule 8: Default - use weak form in non-prominent positions
         return True
     
-    def get_transcription_with_weak_strong(self, word: str, accent: str, use_weak: bool, word_index: int, all_words: List[str]) -> Optional[str]:
-        """Get transcription considering weak/strong forms for RP"""
-        ipa_raw = self.db_lookup(word, accent)
+    def get_transcription_with_weak_strong(self, word: str, accent: str, use_weak: bool, word_index: int, all_words: List[str],
+                                           clean_words: Optional[List[str]] = None,
+                                           is_punct: Optional[Sequence[int]] = None,
+                                           lookup: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """Get transcription considering weak/strong forms for RP
+        
+        If `lookup` (as returned by db_lookup_many) is given it is used instead
+        of querying the database for this word.
+        """
+        if lookup is not None:
+            ipa_raw = lookup.get(word.lower())
+        else:
+            ipa_raw = self.db_lookup(word, accent)
         if not ipa_raw:
             return None
         
@@ -97,7 +277,7 @@ class IPATranscriptionService:
             parsed = self.parse_weak_strong_format(ipa_raw)
             if 'strong' in parsed and 'weak' in parsed:
                 # Aplicar lógica de weak/strong
-                if use_weak and self.should_use_weak(word, word_index, all_words):
+                if use_weak and self.should_use_weak(word, word_index, all_words, clean_words, is_punct):
                     return parsed['weak']
                 else:
                     return parsed['strong']
@@ -109,52 +289,27 @@ class IPATranscriptionService:
     
     def apply_character_corrections(self, text: str, accent: str) -> str:
         """Apply character corrections based on frontend logic"""
-        corrected = text
-        
-        # Remove incorrect slashes from Kaikki data
-        corrected = re.sub(r'^/([^/]+)/$', r'\1', corrected)  # Remove /word/ format
-        corrected = corrected.replace('/', '')  # Remove any remaining slashes
-        
-        # Basic cleanup - use preferred characters
-        corrected = corrected.replace('ɹ', 'r')  # Use r instead of ɹ
-        corrected = corrected.replace('ɛ', 'e')  # Use e instead of ɛ
-        corrected = corrected.replace('ɐ', 'ə')  # Normalize schwa
-        
         if accent == 'american':
-            # American-specific corrections
-            corrected = corrected.replace('ɒ', 'ɑ')      # LOT vowel
-            corrected = corrected.replace('əʊ', 'oʊ')     # GOAT vowel
-            corrected = corrected.replace('ɪə', 'ɪr')     # NEAR
-            corrected = corrected.replace('eə', 'er')     # SQUARE
-            corrected = corrected.replace('ʊə', 'ʊr')     # CURE
-            corrected = corrected.replace('ɜː', 'ɜr')     # NURSE
-            corrected = re.sub(r'ɑː(\s|$)', r'ɑr\1', corrected)  # Rhotic
-        
-        return corrected
+            return _correct_american(text)
+        return _correct_rp(text)
     
     def ends_with_vowel(self, transcription: str) -> bool:
         """Detect if a transcription ends with a vowel"""
         if not transcription:
             return False
         
-        # Common IPA vowels pattern
-        vowel_pattern = re.compile(r'[æɑɒɔʊuɪieoəʌɜɪaʊɔɪɛœ]ː?$')
-        return bool(vowel_pattern.search(transcription.strip()))
+        stripped = transcription.strip()
+        last = stripped[-1:]
+        if last == 'ː' and len(stripped) >= 2:
+            last = stripped[-2]  # Ignore the length mark
+        return last in _VOWEL_END_CHARS
     
     def starts_with_vowel(self, transcription: str) -> bool:
         """Detect if a transcription starts with a vowel"""
         if not transcription:
             return False
         
-        vowel_pattern = re.compile(r'^[æɑɒɔʊʉuiɪeəʌɜoɘaɪaʊɔɪɜɟɨɪəeəʊəɛʎœɶɨɘɵɯɤɦɐʉɦɜɽɨɘɵɯɤ]')
-        return bool(vowel_pattern.search(transcription.strip()))
-    
-    def apply_the_variation(self, transcription: str) -> str:
-        """Apply allophonic variation to 'the'"""
-        # "the" + vowel = /ði/
-        # "the" + consonant = /ðə/
-        the_pattern = re.compile(r'\bðə\s+([æɑɒɔʊu iɪeəʌɜaɪaʊɔɪɪəeəʊəɛ])')
-        return the_pattern.sub(r'ði \1', transcription)
+        return transcription.strip()[:1] in _VOWEL_START_CHARS
     
     def apply_linking_r(self, transcribed_words: List[str], original_words: List[str], accent: str) -> List[str]:
         """Apply Linking R for RP based on original spelling"""
@@ -170,61 +325,85 @@ class IPATranscriptionService:
             next_original = original_words[i + 1]
             
             # Skip punctuation
-            if re.match(r'^[.,!?;:\'-]+$', next_original):
+            if self.punct_re.match(next_original):
                 continue
             
             # Apply linking R if:
             # 1. Original word ends in 'r' or has 'r' in last syllable
             # 2. Current transcription ends with vowel
             # 3. Next transcription starts with vowel
-            original_ends_in_r = bool(re.search(r'r\w*$|\w*r$', current_original, re.IGNORECASE))
+            # Tokens are \w+ or \w+'\w+, so "an 'r' followed only by word
+            # characters" means an 'r' anywhere after the last apostrophe.
+            original_ends_in_r = 'r' in current_original.rsplit("'", 1)[-1].lower()
             
             if (original_ends_in_r and 
                 self.ends_with_vowel(current_transcription) and 
                 self.starts_with_vowel(next_transcription)):
                 
                 # Exceptions where NOT to apply linking R
-                exceptions = ['more', 'sure', 'pure']  # Words that already have R in RP
-                clean_original = re.sub(r'[^\w]', '', current_original.lower())
+                clean_original = _NON_WORD_RE.sub('', current_original.lower())
                 
-                if clean_original not in exceptions and not current_transcription.endswith('r'):
+                if clean_original not in self.LINKING_R_EXCEPTIONS and not current_transcription.endswith('r'):
                     result[i] = current_transcription + 'r'
         
         return result
     
     def apply_rp_symbol_transforms(self, text: str) -> str:
         """Apply RP symbol transformations from frontend logic"""
-        transformed = text
-        
-        # Transform symbols according to specific rules
-        transformed = transformed.replace('!', '(!)')
-        transformed = transformed.replace('?', '(?)')
-        transformed = transformed.replace('.', ' //')
-        transformed = transformed.replace(',', ' /')
-        
-        return transformed
+        # Transform symbols according to specific rules, in a single pass
+        return _RP_SYMBOL_RE.sub(lambda m: _RP_SYMBOLS[m.group(0)], text)
     
-    def transcribe_text(self, text: str, accent: str, use_weak: bool) -> Dict[str, any]:
+    def transcribe_text(self, text: str, accent: str, use_weak: bool) -> Dict[str, Any]:
         """Main transcription function with all phonetic rules applied
         
         Returns:
             Dict with 'transcription' (str) and 'not_found' (List[str])
         """
-        tokens = re.findall(r"\b\w+'\w+\b|\b\w+\b|[.,!?;:'-]", text) or []
+        tokens = _TOKEN_RE.findall(text)
         out: List[str] = []
         not_found_words: List[str] = []
         
+        # Limpiar cada token una sola vez; las reglas indexan estas listas
+        clean_tokens = [_CLEAN_RE.sub('', t.lower()) for t in tokens]
+        is_punct = bytearray(bool(_PUNCT_RE.match(t)) for t in tokens)
+        
+        # Una sola consulta para todas las palabras en lugar de una por token
+        lookup = self.db_lookup_many([t for i, t in enumerate(tokens) if not is_punct[i]], accent)
+        
+        # Pasada 1: resolver todas las decisiones por token antes del bucle
+        # principal. forms[i] es (strong, weak) y use_weak_flags[i] elige
+        forms: List[Optional[Tuple[str, str]]] = [None] * len(tokens)
+        use_weak_flags = bytearray(len(tokens))
+        for i, tok in enumerate(tokens):
+            if is_punct[i]:
+                continue
+            ipa_raw = lookup.get(tok.lower())
+            if not ipa_raw:
+                continue
+            if accent == 'rp':
+                parsed = self.parse_weak_strong_format(ipa_raw)
+                if 'strong' in parsed and 'weak' in parsed:
+                    forms[i] = (parsed['strong'], parsed['weak'])
+                    use_weak_flags[i] = use_weak and self.should_use_weak(
+                        tok, i, tokens, clean_tokens, is_punct)
+                    continue
+                ipa_raw = parsed['single']
+            forms[i] = (ipa_raw, ipa_raw)
+        
+        # Elegir las correcciones del acento una sola vez
+        correct = _correct_american if accent == 'american' else _correct_rp
+        
+        # Pasada 2: bucle principal sin reglas ni consultas
         for i, tok in enumerate(tokens):
-            if self.punct_re.match(tok):
+            if is_punct[i]:
                 out.append(tok)
                 continue
-                
-            # Usar nueva lógica de weak/strong
-            ipa = self.get_transcription_with_weak_strong(tok, accent, use_weak, i, tokens)
             
+            choice = forms[i]
+            ipa = choice[use_weak_flags[i]] if choice else None
             if ipa:
                 # Apply character corrections to the IPA result
-                ipa = self.apply_character_corrections(ipa, accent)
+                ipa = correct(ipa)
                 out.append(ipa)
             else:
                 # Fallback: palabra no encontrada - marcar con asteriscos
@@ -235,11 +414,21 @@ class IPATranscriptionService:
         if accent == 'rp':
             out = self.apply_linking_r(out, tokens, accent)
         
-        result = ' '.join(out)
-        result = re.sub(r"\s+([.,!?;:'-])", r"\1", result)
+        # Apply "the" variation: /ðə/ + vowel = /ði/, /ðə/ + consonant = /ðə/
+        for i in range(len(out) - 1):
+            if out[i] == 'ðə' and not is_punct[i + 1]:
+                following = out[i + 1]
+                stripped = following.lstrip()
+                if stripped[:1] in _THE_VOWELS:
+                    out[i] = 'ði'
+                    out[i + 1] = stripped
+                elif following[:1] == ' ':
+                    # American fallbacks to the RP "/ strong, weak /" format
+                    # start with a space, which has always counted as a vowel here
+                    out[i] = 'ði'
         
-        # Apply "the" variation
-        result = self.apply_the_variation(result)
+        result = ' '.join(out)
+        result = _SPACE_PUNCT_RE.sub(r"\1", result)
         
         # Apply RP symbol transformations
         if accent == 'rp':
@@ -251,11 +440,6 @@ class IPATranscriptionService:
         }
 
 
-def create_transcription_service(db_path: str = None) -> IPATranscriptionService:
+def create_transcription_service(db_path: Optional[str] = None) -> IPATranscriptionService:
     """Factory function to create transcription service"""
-    if db_path is None:
-        # Default path relative to this file
-        current_dir = os.path.dirname(__file__)
-        db_path = os.path.join(current_dir, 'ipa_en.sqlite')
-    
-    return IPATranscriptionService(db_path)
\ No newline at end of file
+    return IPATranscriptionService(resolve_database_path(db_path))
\ No newline at end of file
@@ -3,17 +3,40 @@ Modular IPA Transcription Service
 Refactored version using composition and specialized modules for better maintainability.
 """
 import re
-from typing import Optional, List, Dict
-import os
+from functools import lru_cache
+from typing import Optional, List, Dict, Tuple
 
+from config import resolve_database_path
 from database_service import DatabaseService
 from phonetic_rules import WeakFormProcessor, WeakStrongParser
+from update_weak_forms import WEAK_STRONG_FORMS
 from transformers import (
     CharacterCorrector, TheVariationProcessor, LinkingRProcessor, 
-    RPSymbolTransformer, StressRemover, TransformationPipeline
+    RPSymbolTransformer, StressRemover, TransformationPipeline, FusedPostProcessor
 )
 
 
+# Patterns compiled once at import instead of on every request
+# Same tokens as r"\b\w+'\w+\b|\b\w+\b|[.,!?;:'-]": greedy \w+ always stops at a
+# word boundary, so the \b assertions and the retried alternative are redundant
+_TOKEN_RE = re.compile(r"\w+(?:'\w+)?|[.,!?;:'-]")
+_PUNCT_RE = re.compile(r"^[.,!?;:'-]+$")
+
+
+@lru_cache(maxsize=8192)
+def _split_forms(ipa_raw: str) -> Tuple[str, Optional[str]]:
+    """
+    Parse a raw RP entry once per distinct string
+    
+    Returns:
+        (strong, weak) for "/ strong, weak /" entries, (single, None) otherwise
+    """
+    parsed = WeakStrongParser.parse_format(ipa_raw)
+    if 'strong' in parsed and 'weak' in parsed:
+        return parsed['strong'], parsed['weak']
+    return parsed['single'], None
+
+
 class ModularIPATranscriptionService:
     """
     Modular IPA transcription service using composition pattern.
@@ -32,13 +55,41 @@ class ModularIPATranscriptionService:
         self.linking_r_processor = LinkingRProcessor()
         self.rp_symbol_transformer = RPSymbolTransformer()
         self.stress_remover = StressRemover()
+        self.fused_post_processor = FusedPostProcessor()
         
-        # Build transformation pipeline
-        self.pipeline = TransformationPipeline()
-        self.pipeline.add_transformer(self.character_corrector)
+        # The built-in steps are called directly on the hot path; only
+        # transformers added through add_transformer run through this pipeline
+        self.extension_pipeline = TransformationPipeline()
         
         # Regex for punctuation
-        self.punct_re = re.compile(r"^[.,!?;:'-]+$")
+        self.punct_re = _PUNCT_RE
+        
+        # RP weak/strong entries parsed and character-corrected once, so
+        # process_word_list can skip both steps for these function words;
+        # this also pre-warms the _split_forms cache with the same entries
+        self._rp_forms = self._build_rp_forms()
+    
+    def _build_rp_forms(self) -> Dict[str, Tuple[str, str]]:
+        """
+        Pre-parse the RP weak/strong forms of the words update_weak_forms writes
+        
+        Every RP entry of WEAK_STRONG_FORMS goes through _split_forms here, so
+        get_transcription_with_forms finds them already cached.
+        
+        Returns:
+            Dict mapping word -> (corrected strong, corrected weak) for the
+            words whose RP entry in the database has both forms
+        """
+        rp_forms: Dict[str, Tuple[str, str]] = {}
+        for word in WEAK_STRONG_FORMS:
+            ipa_raw = self.db_service.lookup_word(word, 'rp')
+            if not ipa_raw:
+                continue
+            strong, weak = _split_forms(ipa_raw)
+            if weak is not None:
+                rp_forms[word] = (self.character_corrector.transform(strong, 'rp'),
+                                  self.character_corrector.transform(weak, 'rp'))
+        return rp_forms
     
     def lookup_word(self, word: str, accent: str) -> Optional[str]:
         """Simple word lookup - delegates to database service"""
@@ -57,7 +108,10 @@ class ModularIPATranscriptionService:
         return self.character_corrector.transform(text, accent)
     
     def get_transcription_with_forms(self, word: str, accent: str, use_weak: bool, 
-                                   word_index: int, all_words: List[str]) -> Optional[str]:
+                                   word_index: int, all_words: List[str],
+                                   clean_words: Optional[List[str]] = None,
+                                   is_punct: Optional[List[bool]] = None,
+                                   lookup: Optional[Dict[str, str]] = None) -> Optional[str]:
         """
         Get transcription considering weak/strong forms for RP
         
@@ -67,46 +121,57 @@ class ModularIPATranscriptionService:
             use_weak: Whether to use weak forms
             word_index: Position of word in sentence
             all_words: All words in sentence
+            clean_words: Precomputed cleaned form of every word (optional)
+            is_punct: Precomputed punctuation flag for every word (optional)
+            lookup: Prefetched lowercased word -> IPA map from lookup_words (optional)
             
         Returns:
             IPA transcription or None if not found
         """
-        # Get raw IPA from database
-        ipa_raw = self.db_service.lookup_word(word, accent)
+        # Get raw IPA from the prefetched batch or the database
+        if lookup is not None:
+            ipa_raw = lookup.get(word.lower())
+        else:
+            ipa_raw = self.db_service.lookup_word(word, accent)
         if not ipa_raw:
             return None
         
-        # For RP, check if it has weak/strong format
+        # For RP, check if it has weak/strong format (parsed once per entry)
         if accent == 'rp':
-            parsed = self.parser.parse_format(ipa_raw)
+            strong, weak = _split_forms(ipa_raw)
             
-            if 'strong' in parsed and 'weak' in parsed:
-                # Determine which form to use
-                if use_weak and self.weak_form_processor.should_use_weak(word, word_index, all_words):
-                    # Special handling for words with custom weak forms (have, must)
-                    clean_word = word.lower().replace("'", "")
-                    if clean_word in ['have', 'must']:
-                        # Get context for special weak form rules
-                        context = {
-                            'word_index': word_index,
-                            'words': all_words,
-                            'punct_re': self.weak_form_processor.punct_re
-                        }
-                        # Check if we have a rule with custom get_weak_form method
-                        for rule in self.weak_form_processor.rules:
-                            if hasattr(rule, 'get_weak_form') and rule.applies_to(word, context):
-                                return rule.get_weak_form(word, context)
-                    
-                    return parsed['weak']
-                else:
-                    return parsed['strong']
-            elif 'single' in parsed:
-                return parsed['single']
+            if weak is not None:
+                return self._choose_form(word, strong, weak, use_weak, word_index,
+                                         all_words, clean_words, is_punct)
+            return strong
         
         # For American or simple format, return as-is
         return ipa_raw
     
-    def process_word_list(self, tokens: List[str], accent: str, use_weak: bool) -> tuple[List[str], List[str]]:
+    def _choose_form(self, word: str, strong: str, weak: str, use_weak: bool,
+                     word_index: int, all_words: List[str],
+                     clean_words: Optional[List[str]] = None,
+                     is_punct: Optional[List[bool]] = None) -> str:
+        """Pick the strong, weak or custom weak form of a weak/strong entry"""
+        # Determine which form to use
+        if use_weak and self.weak_form_processor.should_use_weak(
+                word, word_index, all_words, clean_words, is_punct):
+            # Special handling for words with custom weak forms (have, must)
+            clean_word = word.lower().replace("'", "")
+            if clean_word in ['have', 'must']:
+                # Get context for special weak form rules
+                context = self.weak_form_processor.build_context(
+                    word, word_index, all_words, clean_words, is_punct)
+                # Check if we have a rule with custom get_weak_form method
+                for rule in self.weak_form_processor.rules:
+                    if hasattr(rule, 'get_weak_form') and rule.applies_to(word, context):
+                        return rule.get_weak_form(word, context)
+            
+            return weak
+        return strong
+    
+    def process_word_list(self, tokens: List[str], accent: str, use_weak: bool,
+                          lookup: Optional[Dict[str, str]] = None) -> tuple[List[str], List[str]]:
         """
         Process a list of tokens into IPA transcriptions
         
@@ -114,6 +179,9 @@ class ModularIPATranscriptionService:
             tokens: List of words and punctuation
             accent: 'american' or 'rp'
             use_weak: Whether to use weak forms
+            lookup: Prefetched lowercased word -> IPA map (optional, fetched here if
+                omitted). When given, it is used for every word; the pre-parsed RP
+                weak/strong table only applies to lookups fetched here
             
         Returns:
             Tuple of (transcribed_words, not_found_words)
@@ -121,13 +189,36 @@ class ModularIPATranscriptionService:
         transcribed_words = []
         not_found_words = []
         
+        # Clean every token once; the phonetic rules index into these lists
+        clean_words, is_punct = self.weak_form_processor.prepare_words(tokens)
+        
+        # Fetch every distinct word with one batched lookup, skipping punctuation.
+        # _rp_forms is built from the same database, so its fast path is only
+        # taken when the lookup comes from there and not from the caller
+        rp_forms: Dict[str, Tuple[str, str]] = {}
+        if lookup is None:
+            lookup = self.db_service.lookup_words(
+                [token for token, punct in zip(tokens, is_punct) if not punct], accent
+            )
+            if accent == 'rp':
+                rp_forms = self._rp_forms
+        
         for i, token in enumerate(tokens):
-            if self.punct_re.match(token):
+            if is_punct[i]:
                 transcribed_words.append(token)
                 continue
             
+            # Pre-corrected RP weak/strong words skip the parse and the
+            # corrections (the custom have/must weak forms are already clean)
+            forms = rp_forms.get(token.lower())
+            if forms is not None:
+                transcribed_words.append(self._choose_form(
+                    token, forms[0], forms[1], use_weak, i, tokens, clean_words, is_punct))
+                continue
+            
             # Get transcription with weak/strong logic
-            ipa = self.get_transcription_with_forms(token, accent, use_weak, i, tokens)
+            ipa = self.get_transcription_with_forms(token, accent, use_weak, i, tokens,
+                                                    clean_words, is_punct, lookup)
             
             if ipa:
                 # Apply character corrections
@@ -160,15 +251,14 @@ class ModularIPATranscriptionService:
                 transcribed_words, original_tokens, accent
             )
         
-        # Join words and fix punctuation spacing
+        # Join words, then fix punctuation spacing, apply the "the" variation
+        # and (for RP) the symbol transformations in a single pass
         result = ' '.join(transcribed_words)
-        result = re.sub(r"\s+([.,!?;:'-])", r"\1", result)
+        result = self.fused_post_processor.transform(result, accent)
         
-        # Apply "the" variation
-        result = self.the_variation_processor.transform(result, accent)
-        
-        # Apply RP symbol transformations
-        result = self.rp_symbol_transformer.transform(result, accent)
+        # Slow path, only taken when user transformers were added
+        if self.extension_pipeline.transformers:
+            result = self.extension_pipeline.transform(result, accent)
         
         return result.strip()
     
@@ -186,7 +276,7 @@ class ModularIPATranscriptionService:
             Dict with 'transcription' (str) and 'not_found' (List[str])
         """
         # Tokenize input text
-        tokens = re.findall(r"\b\w+'\w+\b|\b\w+\b|[.,!?;:'-]", text) or []
+        tokens = _TOKEN_RE.findall(text)
         
         # Process words into IPA
         transcribed_words, not_found_words = self.process_word_list(tokens, accent, use_weak)
@@ -210,12 +300,23 @@ class ModularIPATranscriptionService:
         self.weak_form_processor.remove_rule(rule_class)
     
     def add_transformer(self, transformer):
-        """Add a new transformer to the pipeline"""
-        self.pipeline.add_transformer(transformer)
+        """Add a new transformer, applied to the joined text after post-processing"""
+        self.extension_pipeline.add_transformer(transformer)
     
     def remove_transformer(self, transformer_class):
-        """Remove a transformer from the pipeline"""
-        self.pipeline.remove_transformer(transformer_class)
+        """Remove user transformers of the given class added through add_transformer"""
+        self.extension_pipeline.remove_transformer(transformer_class)
+    
+    def reload_data(self) -> None:
+        """
+        Pick up database changes without a restart
+        
+        Re-reads the word index and drops everything derived from it: the
+        parsed RP entries of _split_forms and the pre-corrected _rp_forms.
+        """
+        self.db_service.reload()
+        _split_forms.cache_clear()
+        self._rp_forms = self._build_rp_forms()
     
     def get_database_stats(self):
         """Get database statistics"""
@@ -225,7 +326,7 @@ class ModularIPATranscriptionService:
         }
 
 
-def create_transcription_service(db_path: str = None) -> ModularIPATranscriptionService:
+def create_transcription_service(db_path: Optional[str] = None) -> ModularIPATranscriptionService:
     """
     Factory function to create modular transcription service
     
@@ -235,14 +336,4 @@ def create_transcription_service(db_path: str = None) -> ModularIPATranscription
     Returns:
         Configured ModularIPATranscriptionService instance
     """
-    if db_path is None:
-        # Try to import config for database path
-        try:
-            from config import config
-            db_path = config.DATABASE_PATH
-        except ImportError:
-            # Fallback to default path relative to this file
-            current_dir = os.path.dirname(__file__)
-            db_path = os.path.join(current_dir, 'ipa_en.sqlite')
-    
-    return ModularIPATranscriptionService(db_path)
+    return ModularIPATranscriptionService(resolve_database_path(db_path))
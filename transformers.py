@@ -7,6 +7,20 @@ from typing import List
 from abc import ABC, abstractmethod
 
 
+# Patterns compiled once at import instead of on every call
+_LINKING_PUNCT_RE = re.compile(r'^[.,!?;\'-]+$')
+_ENDS_IN_R_RE = re.compile(r'r\w*$', re.IGNORECASE)  # same matches as r'r\w*$|\w*r$'
+_NON_WORD_RE = re.compile(r'[^\w]')
+_PERIOD_RE = re.compile(r'\s*\.\s*')
+_FINAL_PERIOD_RE = re.compile(r'\.$')
+
+# Characters after "ðə" that trigger /ði/ (the space is part of the original class)
+_THE_FOLLOWERS = 'æɑɒɔʊu iɪeəʌɜaɪaʊɔɪɪəeəʊəɛ'
+
+# Punctuation that attracts the preceding whitespace when words are joined
+_JOIN_PUNCT = ".,!?;:'-"
+
+
 class Transformer(ABC):
     """Abstract base class for transformers"""
     
@@ -36,29 +50,37 @@ class CharacterCorrector(Transformer):
             'ʊə': 'ʊr',    # CURE
             'ɜː': 'ɜr',    # NURSE
         }
+        
+        # Every basic entry is a single code point, so one str.translate
+        # pass applies them all, together with the removal of Kaikki slashes
+        # (a surrounding "/.../" pair included) and syllable boundary markers
+        self._basic_table = str.maketrans({**self.basic_replacements, '/': None, '.': None})
+        
+        # American entries (multi-character, so not translatable) plus the
+        # rhotic rule as one alternation. The lookaheads and the 'əʊə' entry
+        # reproduce the results of applying the replacements one after
+        # another ('əʊə' -> 'oʊə' -> 'oʊr');
+        # 'ɒː' covers LOT turning into 'ɑː' before the rhotic rule runs
+        self._american_map = dict(self.american_replacements)
+        self._american_map.update({'əʊə': 'oʊr', 'ɑː': 'ɑr', 'ɒː': 'ɑr'})
+        self._american_re = re.compile(
+            r'əʊə(?!ʊ)|əʊ|ɪə(?!ʊ)|eə(?!ʊ)|ʊə(?!ʊ)|ɜː|[ɑɒ]ː(?=\s|$)|ɒ'
+        )
     
     def transform(self, text: str, accent: str = None) -> str:
         """Apply character corrections"""
-        corrected = text
-        
-        # Remove incorrect slashes from Kaikki data
-        corrected = re.sub(r'^/([^/]+)/$', r'\1', corrected)
-        corrected = corrected.replace('/', '')
-        
-        # Remove syllable boundary markers
-        corrected = corrected.replace('.', '')
+        # Every symbol the tables touch except '/' and '.' is non-ASCII, and
+        # str.isascii() is a constant-time flag check on CPython
+        if text.isascii() and '/' not in text and '.' not in text:
+            return text
         
-        # Apply basic replacements
-        for old_char, new_char in self.basic_replacements.items():
-            corrected = corrected.replace(old_char, new_char)
+        # Remove slashes and syllable boundary markers, apply basic replacements
+        corrected = text.translate(self._basic_table)
         
-        # Apply accent-specific replacements
-        if accent == 'american':
-            for old_char, new_char in self.american_replacements.items():
-                corrected = corrected.replace(old_char, new_char)
-            
-            # Special rhotic replacement
-            corrected = re.sub(r'ɑː(\s|$)', r'ɑr\1', corrected)
+        # Apply accent-specific replacements (including the rhotic 'ɑː')
+        if accent == 'american' and not corrected.isascii():
+            american = self._american_map
+            corrected = self._american_re.sub(lambda m: american[m.group()], corrected)
         
         return corrected
 
@@ -66,21 +88,26 @@ class CharacterCorrector(Transformer):
 class VowelDetector:
     """Utility class for vowel detection"""
     
-    def __init__(self):
-        self.vowel_end_pattern = re.compile(r'[æɑɒɔʊuɪieoəʌɜɪaʊɔɪɛœ]ː?$')
-        self.vowel_start_pattern = re.compile(r'^[æɑɒɔʊʉuiɪeəʌɜoɘaɪaʊɔɪɜɟɨɪəeəʊəɛʎœɶɨɘɵɯɤɦɐʉɦɜɽɨɘɵɯɤ]')
+    # Same characters as the former character-class regexes; only the first
+    # or last grapheme matters, so a set membership test replaces the search
+    VOWEL_END_CHARS = frozenset('æɑɒɔʊuɪieoəʌɜɪaʊɔɪɛœ')
+    VOWEL_START_CHARS = frozenset('æɑɒɔʊʉuiɪeəʌɜoɘaɪaʊɔɪɜɟɨɪəeəʊəɛʎœɶɨɘɵɯɤɦɐʉɦɜɽɨɘɵɯɤ')
     
     def ends_with_vowel(self, transcription: str) -> bool:
-        """Check if transcription ends with a vowel"""
+        """Check if transcription ends with a vowel (optionally followed by ː)"""
         if not transcription:
             return False
-        return bool(self.vowel_end_pattern.search(transcription.strip()))
+        text = transcription.strip()
+        if text.endswith('ː'):
+            text = text[:-1]
+        return bool(text) and text[-1] in self.VOWEL_END_CHARS
     
     def starts_with_vowel(self, transcription: str) -> bool:
         """Check if transcription starts with a vowel"""
         if not transcription:
             return False
-        return bool(self.vowel_start_pattern.search(transcription.strip()))
+        text = transcription.strip()
+        return bool(text) and text[0] in self.VOWEL_START_CHARS
 
 
 class TheVariationProcessor(Transformer):
@@ -88,7 +115,7 @@ class TheVariationProcessor(Transformer):
     
     def __init__(self):
         # "the" + vowel = /ði/, "the" + consonant = /ðə/
-        self.the_pattern = re.compile(r'\bðə\s+([æɑɒɔʊu iɪeəʌɜaɪaʊɔɪɪəeəʊəɛ])')
+        self.the_pattern = re.compile(rf'\bðə\s+([{_THE_FOLLOWERS}])')
     
     def transform(self, text: str, accent: str = None) -> str:
         """Apply 'the' variation rule"""
@@ -112,32 +139,26 @@ class LinkingRProcessor(Transformer):
         if accent != 'rp' or len(transcribed_words) < 2 or len(original_words) != len(transcribed_words):
             return transcribed_words
         
-        result = transcribed_words.copy()
+        # Every check depends on one token only, so compute each flag once per
+        # token up front; the scan below then only combines booleans
+        detector = self.vowel_detector
+        ends_in_r = [bool(_ENDS_IN_R_RE.search(w)) for w in original_words]
+        is_punct = [bool(_LINKING_PUNCT_RE.match(w)) for w in original_words]
+        ends_vowel = [detector.ends_with_vowel(t) for t in transcribed_words]
+        starts_vowel = [detector.starts_with_vowel(t) for t in transcribed_words]
         
-        for i in range(len(result) - 1):
-            current_transcription = result[i]
-            next_transcription = result[i + 1]
-            current_original = original_words[i]
-            next_original = original_words[i + 1]
-            
-            # Skip punctuation
-            if re.match(r'^[.,!?;\'-]+$', next_original):
-                continue
-            
-            # Check conditions for linking R
-            original_ends_in_r = bool(re.search(r'r\w*$|\w*r$', current_original, re.IGNORECASE))
-            
-            if (original_ends_in_r and 
-                self.vowel_detector.ends_with_vowel(current_transcription) and 
-                self.vowel_detector.starts_with_vowel(next_transcription)):
-                
-                # Apply exceptions
-                clean_original = re.sub(r'[^\w]', '', current_original.lower())
-                
-                if clean_original not in self.exceptions and not current_transcription.endswith('r'):
-                    result[i] = current_transcription + 'r'
+        # Positions that get a linking R: conditions met, punctuation skipped,
+        # exceptions and transcriptions already ending in 'r' left alone
+        exceptions = self.exceptions
+        linked = {
+            i for i in range(len(transcribed_words) - 1)
+            if (not is_punct[i + 1] and ends_in_r[i] and ends_vowel[i] and starts_vowel[i + 1]
+                and not transcribed_words[i].endswith('r')
+                and _NON_WORD_RE.sub('', original_words[i].lower()) not in exceptions)
+        }
         
-        return result
+        # Build the output in one pass; only linked words allocate a new string
+        return [w + 'r' if i in linked else w for i, w in enumerate(transcribed_words)]
 
 
 class RPSymbolTransformer(Transformer):
@@ -163,25 +184,82 @@ class RPSymbolTransformer(Transformer):
         
         # Handle sentence-ending periods separately (not syllable boundaries)
         # Only replace periods that are at word boundaries, not within IPA transcriptions
-        import re
         # Replace periods that appear as separate tokens (sentence endings)
-        transformed = re.sub(r'\s*\.\s*', ' // ', transformed)  # " . " -> " // "
-        transformed = re.sub(r'\.$', ' //', transformed)        # "." at end -> " //"
+        transformed = _PERIOD_RE.sub(' // ', transformed)        # " . " -> " // "
+        transformed = _FINAL_PERIOD_RE.sub(' //', transformed)   # "." at end -> " //"
         transformed = transformed.strip()  # Clean up any trailing spaces
         
         return transformed
 
 
+class FusedPostProcessor(Transformer):
+    """
+    Punctuation spacing, "the" variation and RP symbols in a single regex pass
+    
+    Produces the same text as running the punctuation-spacing fix,
+    TheVariationProcessor and RPSymbolTransformer one after another on the
+    joined words, without re-scanning the string for every step.
+    """
+    
+    def __init__(self):
+        punct = re.escape(_JOIN_PUNCT)
+        # "ðə" + whitespace + vowel, unless that whitespace is the kind the
+        # spacing fix deletes (a run followed by punctuation)
+        the = rf'(?P<the>\bðə(?!\s+[{punct}])\s+(?P<v>[{_THE_FOLLOWERS}]))'
+        
+        # Every alternative starts at whitespace, 'ð' or an RP symbol; the
+        # leading lookahead lets the engine skip other positions cheaply
+        self.patterns = {
+            'american': re.compile(rf'(?=[\sð])(?:{the}|(?P<space>\s+(?=[{punct}])))'),
+            # A period swallows the whitespace around it, including the
+            # leading space of a comma's ' /' right after it
+            'rp': re.compile(
+                rf'(?=[\sð.,!?])(?:{the}'
+                rf'|\s*(?:(?P<period>\.\s*(?P<comma_after>,)?)|(?P<bang>!)|(?P<question>\?)|(?P<comma>,))'
+                rf"|(?P<space>\s+(?=[;:'-])))"
+            ),
+        }
+        self.replacements = {
+            'space': '',
+            'bang': '(!)',
+            'question': '(?)',
+            'comma': ' /',
+        }
+    
+    def _replace(self, match: re.Match) -> str:
+        """Replacement for whichever alternative matched"""
+        group = match.lastgroup
+        replacement = self.replacements.get(group)
+        if replacement is not None:
+            return replacement
+        if group == 'the':
+            return 'ði ' + match.group('v')
+        return ' // /' if match.group('comma_after') else ' // '
+    
+    def transform(self, text: str, accent: str = None) -> str:
+        """Apply all joined-text rules for the accent in one pass"""
+        result = self.patterns['rp' if accent == 'rp' else 'american'].sub(self._replace, text)
+        return result.strip() if accent == 'rp' else result
+
+
 class StressRemover(Transformer):
     """Removes stress markers from IPA text"""
     
+    # Deletes both markers in one str.translate pass
+    STRESS_TABLE = str.maketrans('', '', 'ˈˌ')
+    
     def transform(self, text: str, accent: str = None) -> str:
         """Remove primary and secondary stress markers"""
-        return text.replace('ˈ', '').replace('ˌ', '')
+        return text.translate(self.STRESS_TABLE)
 
 
 class TransformationPipeline:
-    """Pipeline for applying multiple transformers in sequence"""
+    """
+    Pipeline for applying multiple transformers in sequence
+    
+    Meant for user extensions: the built-in transformers are called directly
+    by the transcription service, without the per-transformer dispatch.
+    """
     
     def __init__(self):
         self.transformers = []
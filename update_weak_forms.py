@@ -72,22 +72,27 @@ def main():
     
     print("Actualizando formas weak/strong para RP...")
     
-    updated_count = 0
+    # Palabras que ya existen, para informar si cada una se actualiza o se inserta
+    words = list(WEAK_STRONG_FORMS)
+    placeholders = ', '.join('?' * len(words))
+    existing = {row[0] for row in cur.execute(
+        f"SELECT word FROM ipa WHERE word IN ({placeholders})", words)}
+    
+    # Una sola sentencia preparada y una sola transacción para todas las
+    # palabras: actualiza 'gb' (British) si la palabra existe y la inserta si no
+    # ('word' es la PRIMARY KEY, así que ON CONFLICT la usa directamente)
+    with conn:
+        cur.executemany(
+            "INSERT INTO ipa(word, us, gb) VALUES (?, NULL, ?) "
+            "ON CONFLICT(word) DO UPDATE SET gb = excluded.gb",
+            list(WEAK_STRONG_FORMS.items()),
+        )
+    updated_count = cur.rowcount
+    
     for word, rp_form in WEAK_STRONG_FORMS.items():
-        # Actualizar la columna 'gb' (British) con el formato weak/strong
-        cur.execute("UPDATE ipa SET gb = ? WHERE word = ?", (rp_form, word))
-        
-        if cur.rowcount > 0:
-            updated_count += 1
-            print(f"Actualizado: {word} -> {rp_form}")
-        else:
-            # Si la palabra no existe, insertarla
-            cur.execute("INSERT OR IGNORE INTO ipa(word, us, gb) VALUES (?, NULL, ?)", (word, rp_form))
-            if cur.rowcount > 0:
-                updated_count += 1
-                print(f"Insertado: {word} -> {rp_form}")
-    
-    conn.commit()
+        action = "Actualizado" if word in existing else "Insertado"
+        print(f"{action}: {word} -> {rp_form}")
+    
     conn.close()
     
     print(f"\nActualización completada. {updated_count} palabras modificadas.")